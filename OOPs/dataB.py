@@ -1,7 +1,15 @@
-import sqlite3
+import os
+import sys
+ 
+# Query instrumentation lives with the other SQLite helpers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "db_convitivity"))
+from query_stats import QueryStats, connect
+ 
+# Record timings for every statement (anything over 10 ms lands in the slow log)
+stats = QueryStats(slow_ms=10)
  
 # Connect to a database (or create it if it doesn't exist)
-conn = sqlite3.connect('mydatabase.db')
+conn = connect('mydatabase.db', stats)
 cursor = conn.cursor()
  
 # Create a table
@@ -31,4 +39,8 @@ for row in rows:
     print(row)
  
 # Close connection
-conn.close()
\ No newline at end of file
+cursor.close()
+conn.close()
+ 
+# Show how long each query took
+print(stats.report())
\ No newline at end of file
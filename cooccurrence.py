@@ -0,0 +1,210 @@
+"""
+cooccurrence.py
+
+"Frequently ordered together" index over placed carts.
+A sparse, symmetric co-occurrence matrix (food_id -> {food_id: weight}) is
+updated incrementally per placed order. Each row keeps a cached top list
+that is only rebuilt when the row changes, so top-k queries on the checkout
+path are a dict lookup plus a slice.
+
+Decay is O(1): weights are stored divided by a global scale factor, and
+decay() only shrinks the factor (rows are renormalized when it gets tiny).
+Decay multiplies every weight equally, so cached rankings stay valid.
+"""
+
+import heapq
+import json
+import os
+from typing import Dict, Iterable, List, Set, Tuple
+
+from foodapp import Cart
+from order_journal import replay_history
+
+# how many companions each cached row keeps; top_k(k) with k <= this is a slice
+CACHED_TOP = 32
+_RENORMALIZE_BELOW = 1e-9
+
+
+class CooccurrenceIndex:
+    def __init__(self) -> None:
+        # food_id -> {other_food_id: weight / scale}
+        self._rows: Dict[int, Dict[int, float]] = {}
+        # food_id -> number of orders containing it (also / scale)
+        self._orders: Dict[int, float] = {}
+        self._scale = 1.0
+        # food_id -> [(other_food_id, stored weight)], best first
+        self._top: Dict[int, List[Tuple[int, float]]] = {}
+        self._dirty: Set[int] = set()
+        self.orders_recorded = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # ---- updates ----
+
+    def record(self, food_ids: Iterable[int]) -> None:
+        """Add one placed order (quantities don't matter, only which items)."""
+        ids = sorted(set(food_ids))
+        step = 1.0 / self._scale
+        for food_id in ids:
+            self._orders[food_id] = self._orders.get(food_id, 0.0) + step
+        for i, a in enumerate(ids):
+            row_a = self._rows.setdefault(a, {})
+            for b in ids[i + 1:]:
+                row_a[b] = row_a.get(b, 0.0) + step
+                row_b = self._rows.setdefault(b, {})
+                row_b[a] = row_b.get(a, 0.0) + step
+        if len(ids) > 1:
+            self._dirty.update(ids)
+        self.orders_recorded += 1
+
+    def record_cart(self, cart: Cart) -> None:
+        self.record(item.food.id for item in cart.items)
+
+    def decay(self, factor: float) -> None:
+        """Multiply every weight by factor (0 < factor <= 1), e.g. nightly 0.9."""
+        if not 0 < factor <= 1:
+            raise ValueError("Decay factor must be in (0, 1].")
+        self._scale *= factor
+        if self._scale < _RENORMALIZE_BELOW:
+            self._renormalize()
+
+    def _renormalize(self) -> None:
+        scale = self._scale
+        for row in self._rows.values():
+            for other in row:
+                row[other] *= scale
+        for food_id in self._orders:
+            self._orders[food_id] *= scale
+        self._scale = 1.0
+        self._top.clear()
+        self._dirty.clear()
+
+    def prune(self, min_weight: float) -> int:
+        """Drop pairs whose (decayed) weight fell below min_weight. Returns pairs removed."""
+        threshold = min_weight / self._scale
+        removed = 0
+        for food_id, row in list(self._rows.items()):
+            stale = [other for other, weight in row.items() if weight < threshold]
+            for other in stale:
+                del row[other]
+            removed += len(stale)
+            if stale:
+                self._dirty.add(food_id)
+            if not row:
+                del self._rows[food_id]
+        return removed
+
+    # ---- queries ----
+
+    def _top_row(self, food_id: int) -> List[Tuple[int, float]]:
+        if food_id in self._dirty or food_id not in self._top:
+            row = self._rows.get(food_id, {})
+            self._top[food_id] = heapq.nlargest(CACHED_TOP, row.items(), key=lambda kv: kv[1])
+            self._dirty.discard(food_id)
+        return self._top[food_id]
+
+    def top_k(self, food_id: int, k: int = 5) -> List[Tuple[int, float]]:
+        """[(companion_food_id, weight)] best first."""
+        scale = self._scale
+        if k <= CACHED_TOP:
+            return [(other, weight * scale) for other, weight in self._top_row(food_id)[:k]]
+        row = self._rows.get(food_id, {})
+        return [(other, weight * scale)
+                for other, weight in heapq.nlargest(k, row.items(), key=lambda kv: kv[1])]
+
+    def suggest(self, food_ids: Iterable[int], k: int = 3) -> List[Tuple[int, float]]:
+        """Add-on suggestions for a cart: companions of its items, minus what's already in it."""
+        in_cart = set(food_ids)
+        scores: Dict[int, float] = {}
+        for food_id in in_cart:
+            for other, weight in self._top_row(food_id):
+                if other not in in_cart:
+                    scores[other] = scores.get(other, 0.0) + weight
+        best = heapq.nlargest(k, scores.items(), key=lambda kv: kv[1])
+        return [(other, weight * self._scale) for other, weight in best]
+
+    def suggest_for_cart(self, cart: Cart, k: int = 3) -> List[Tuple[int, float]]:
+        return self.suggest((item.food.id for item in cart.items), k)
+
+    def confidence(self, food_id: int, other_id: int) -> float:
+        """Share of orders with food_id that also had other_id."""
+        orders = self._orders.get(food_id, 0.0)
+        if not orders:
+            return 0.0
+        return self._rows.get(food_id, {}).get(other_id, 0.0) / orders
+
+    # ---- persistence ----
+
+    def save(self, path: str) -> None:
+        """Write a JSON snapshot atomically (temp file + rename)."""
+        scale = self._scale
+        data = {
+            "orders_recorded": self.orders_recorded,
+            "orders": {str(f): round(w * scale, 6) for f, w in self._orders.items()},
+            "pairs": {
+                str(a): {str(b): round(w * scale, 6) for b, w in row.items()}
+                for a, row in self._rows.items()
+            },
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CooccurrenceIndex":
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        index = cls()
+        index.orders_recorded = data.get("orders_recorded", 0)
+        index._orders = {int(f): w for f, w in data["orders"].items()}
+        index._rows = {
+            int(a): {int(b): w for b, w in row.items()} for a, row in data["pairs"].items()
+        }
+        return index
+
+    @classmethod
+    def from_journal(cls, directory: str, allow_partial: bool = False) -> "CooccurrenceIndex":
+        """
+        Build from the order journal (order_journal.py). Raises
+        CompactedHistoryError if compaction removed earlier orders; save() the
+        index before compacting, or pass allow_partial=True to count what is left.
+        """
+        index = cls()
+        for record in replay_history(directory, allow_partial):
+            index.record(line[0] for line in record.get("lines", ()))
+        return index
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from foodapp import build_default_menu
+
+    menu = build_default_menu()
+    rng = random.Random(5)
+    index = CooccurrenceIndex()
+    pairs = [(2, 5), (1, 7), (4, 6)]  # Farmhouse+Garlic Bread, Margherita+Coke, Tikka+Dip
+
+    start = time.perf_counter()
+    for _ in range(100_000):
+        order = set(rng.choice(pairs)) if rng.random() < 0.6 else set()
+        order.update(rng.sample(range(1, 9), rng.randint(1, 3)))
+        index.record(order)
+    build_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for n in range(100_000):
+        index.top_k(1 + n % 8, 3)
+    query_us = (time.perf_counter() - start) / 100_000 * 1e6
+
+    farmhouse = menu.get_food(2)
+    print(f"Recorded 100000 orders in {build_sec:.2f}s; top_k takes {query_us:.2f} µs")
+    print(f"With {farmhouse.name}, customers also ordered:")
+    for food_id, weight in index.top_k(farmhouse.id, 3):
+        print(f"  {menu.get_food(food_id).name:<20} {weight:>10.0f} orders "
+              f"({index.confidence(farmhouse.id, food_id):.0%})")
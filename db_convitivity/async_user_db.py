@@ -0,0 +1,100 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import user_db
+
+
+class AsyncUserRepository:
+    """
+    Async facade over user_db for event-loop code.
+    Every call runs on a bounded thread pool; each worker thread reuses its
+    own pooled SQLite connection, so the loop never blocks on disk.
+
+        async with AsyncUserRepository(max_workers=8) as repo:
+            users = await repo.find_users_by_email(emails)
+    """
+
+    def __init__(self, max_workers=8, batch_size=500):
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="user-db")
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    # -------- CRUD (same arguments as user_db) --------
+    async def add_user(self, name, email, age):
+        return await self._run(user_db.add_user, name, email, age)
+
+    async def get_all_users(self):
+        return await self._run(user_db.get_all_users)
+
+    async def find_user_by_email(self, email):
+        return await self._run(user_db.find_user_by_email, email)
+
+    async def update_user(self, email, new_name, new_age):
+        return await self._run(user_db.update_user, email, new_name, new_age)
+
+    async def delete_user(self, email):
+        return await self._run(user_db.delete_user, email)
+
+    async def get_users_page(self, page_token=None, limit=100):
+        return await self._run(user_db.get_users_page, page_token, limit)
+
+    # -------- Batch / streaming --------
+    async def find_users_by_email(self, emails):
+        """{email: row or None}; batches of batch_size are looked up concurrently."""
+        emails = list(dict.fromkeys(emails))
+        batches = [emails[i:i + self.batch_size] for i in range(0, len(emails), self.batch_size)]
+        results = await asyncio.gather(
+            *(self._run(user_db.find_users_by_email, batch) for batch in batches)
+        )
+        found = {}
+        for result in results:
+            found.update(result)
+        return found
+
+    async def iter_users(self, chunk_size=1000):
+        """Async generator over all users, one keyset page per executor call."""
+        token = None
+        while True:
+            rows, token = await self._run(user_db.get_users_page, token, chunk_size)
+            for row in rows:
+                yield row
+            if token is None:
+                return
+
+    # -------- Lifecycle --------
+    async def close(self):
+        # wait for in-flight queries without blocking the loop
+        await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self._executor.shutdown, wait=True)
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+if __name__ == "__main__":
+    import time
+
+    async def demo():
+        async with AsyncUserRepository() as repo:
+            emails = [row[2] async for row in repo.iter_users()][:5000]
+            start = time.perf_counter()
+            single = await asyncio.gather(*(repo.find_user_by_email(e) for e in emails))
+            one_by_one = time.perf_counter() - start
+
+            user_db.configure_cache()  # cold cache for a fair comparison
+            start = time.perf_counter()
+            batch = await repo.find_users_by_email(emails)
+            batched = time.perf_counter() - start
+
+            print(f"{len(single)} gathered lookups: {one_by_one:.3f}s")
+            print(f"{len(batch)} batched lookups:  {batched:.3f}s")
+
+    asyncio.run(demo())
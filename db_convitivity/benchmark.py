@@ -0,0 +1,93 @@
+"""
+benchmark.py
+
+Compares user_db storage settings on a throwaway database:
+  python benchmark.py --users 2000 --lookups 20000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import user_db
+from database import create_db
+from db_pool import DEFAULT_PRAGMAS, SQLITE_DEFAULT_PRAGMAS
+
+
+CONFIGS = [
+    ("pool, sqlite defaults", SQLITE_DEFAULT_PRAGMAS),
+    ("pool, WAL + sync=normal", DEFAULT_PRAGMAS),
+    ("pool, WAL + sync=off", dict(DEFAULT_PRAGMAS, synchronous="off")),
+]
+
+
+def emails(count):
+    return [f"user{i}@example.com" for i in range(count)]
+
+
+def time_per_call_connect(path, lookups, keys):
+    # What user_db did before pooling: connect / query / close every call.
+    start = time.perf_counter()
+    for email in random.Random(1).choices(keys, k=lookups):
+        conn = sqlite3.connect(path)
+        conn.execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
+        conn.close()
+    return time.perf_counter() - start
+
+
+def run_config(directory, label, pragmas, users, lookups, cache_entries=0):
+    path = os.path.join(directory, f"bench_{len(os.listdir(directory))}.db")
+    create_db(path)
+    user_db.configure(path, pragmas=pragmas)
+    user_db.configure_cache(max_entries=cache_entries)
+    keys = emails(users)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for i, email in enumerate(keys):
+            user_db.add_user(f"User {i}", email, 20 + i % 50)
+        insert_sec = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for email in random.Random(1).choices(keys, k=lookups):
+            user_db.find_user_by_email(email)
+        lookup_sec = time.perf_counter() - start
+
+    return path, users / insert_sec, lookups / lookup_sec
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark user_db storage settings.")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"{'Setting':<28} {'Inserts/sec':>14} {'Lookups/sec':>14}")
+    print("-" * 60)
+    with tempfile.TemporaryDirectory() as directory:
+        path = None
+        for label, pragmas in CONFIGS:
+            path, inserts, lookups = run_config(directory, label, pragmas, args.users, args.lookups)
+            print(f"{label:<28} {inserts:>14.0f} {lookups:>14.0f}")
+
+        label = "WAL pool + email cache"
+        _, inserts, lookups = run_config(
+            directory, label, DEFAULT_PRAGMAS, args.users, args.lookups, cache_entries=args.users
+        )
+        print(f"{label:<28} {inserts:>14.0f} {lookups:>14.0f}")
+        user_db.configure(user_db.DB_PATH)
+        user_db.configure_cache()
+
+        seconds = time_per_call_connect(path, args.lookups, emails(args.users))
+        print(f"{'connect/close per call':<28} {'-':>14} {args.lookups / seconds:>14.0f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+bulk_import.py
+
+Bulk user import: streams users from CSV (name,email,age header) or JSONL
+and inserts them with executemany, one transaction per batch, instead of
+one INSERT + commit + print per user.
+
+  python bulk_import.py partner_users.csv --batch-size 5000
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+
+import user_db
+from email_bloom import load_email_bloom
+from user_db import MAX_SQL_PARAMS
+
+
+@dataclass
+class ImportReport:
+    read: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    seconds: float = 0.0
+    # email filter: lookups it made unnecessary, and "maybe"s that turned out new
+    filter_skipped: int = 0
+    filter_false_positives: int = 0
+    filter_rebuilds: int = 0
+    filter_stats: dict = None  # stats() of the filter the import ended with
+    duplicate_samples: list = field(default_factory=list)
+
+    @property
+    def rows_per_sec(self):
+        return self.read / self.seconds if self.seconds else 0.0
+
+    @property
+    def filter_fp_rate(self):
+        # share of new emails the filter still sent to SQLite
+        negatives = self.filter_skipped + self.filter_false_positives
+        return self.filter_false_positives / negatives if negatives else 0.0
+
+
+# -------- Readers --------
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            yield row.get("name"), row.get("email"), row.get("age")
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if not isinstance(row, dict):
+                yield None, None, None  # clean_row rejects it, so it counts as invalid
+                continue
+            yield row.get("name"), row.get("email"), row.get("age")
+
+
+def read_users(path):
+    return read_jsonl(path) if path.endswith((".jsonl", ".json")) else read_csv(path)
+
+
+def clean_row(row):
+    """(name, email, age) with whitespace stripped and age as int, or None if unusable."""
+    name, email, age = row
+    name = (name or "").strip()
+    email = (email or "").strip()
+    if not name or not email:
+        return None
+    if age in (None, ""):
+        return name, email, None
+    try:
+        return name, email, int(age)
+    except (TypeError, ValueError):
+        return None
+
+
+# -------- Import --------
+def existing_emails(conn, emails):
+    found = set()
+    emails = list(emails)
+    for start in range(0, len(emails), MAX_SQL_PARAMS):
+        chunk = emails[start:start + MAX_SQL_PARAMS]
+        marks = ",".join("?" * len(chunk))
+        found.update(
+            row[0] for row in conn.execute(f"SELECT email FROM users WHERE email IN ({marks})", chunk)
+        )
+    return found
+
+
+def _sized_filter(conn, email_filter, shared, incoming):
+    # A filter that overflows its capacity answers "maybe" to almost everything,
+    # so grow it (re-reading the table) before a batch would push it past.
+    # Sizing from the current row count doubles the capacity each time.
+    if not email_filter.needs_rebuild(incoming=incoming):
+        return email_filter
+    if shared:
+        return user_db.enable_email_filter(email_filter.error_rate, extra=incoming)
+    return load_email_bloom(conn, email_filter.error_rate, extra=incoming)
+
+
+def _insert_batch(conn, batch, report, sample_limit, duplicates_out, email_filter):
+    # Duplicates inside the batch and against the table are filtered up front,
+    # so the INSERT never hits an IntegrityError half way through a batch.
+    unique = {}
+    dupes = []
+    for row in batch:
+        if row[1] in unique:
+            dupes.append(row[1])
+        else:
+            unique[row[1]] = row
+    if email_filter is None:
+        taken = existing_emails(conn, unique)
+    else:
+        # only emails the filter has (maybe) seen need a lookup
+        maybe = [email for email, hit in zip(unique, email_filter.contains_many(unique)) if hit]
+        taken = existing_emails(conn, maybe)
+        report.filter_skipped += len(unique) - len(maybe)
+        report.filter_false_positives += len(maybe) - len(taken)
+    dupes.extend(taken)
+    fresh = [row for email, row in unique.items() if email not in taken]
+
+    # rowcount, not total_changes: rows written by triggers (search index) mustn't count
+    with conn:
+        inserted = conn.executemany(
+            "INSERT OR IGNORE INTO users (name, email, age) VALUES (?, ?, ?)", fresh
+        ).rowcount if fresh else 0
+    if inserted:
+        # clear cached "not found" answers for the new emails
+        user_db.invalidate_cached(*(row[1] for row in fresh))
+        if email_filter is not None:
+            email_filter.update(row[1] for row in fresh)
+
+    report.inserted += inserted
+    # anything INSERT OR IGNORE skipped was added concurrently by someone else
+    report.duplicates += len(dupes) + (len(fresh) - inserted)
+    room = sample_limit - len(report.duplicate_samples)
+    if room > 0:
+        report.duplicate_samples.extend(dupes[:room])
+    if duplicates_out is not None and dupes:
+        duplicates_out.write("\n".join(dupes) + "\n")
+
+
+def import_users(rows, batch_size=5000, progress=None, sample_limit=20, duplicates_out=None,
+                 email_filter=None):
+    """
+    Insert (name, email, age) rows in batches of batch_size, one transaction each.
+    progress(report) is called after every batch; every duplicate email is
+    written to duplicates_out (a text file) if given. email_filter (an
+    EmailBloom, default user_db.email_filter()) skips lookups for new emails;
+    it is rebuilt bigger between batches whenever the next batch would overfill it.
+    Returns an ImportReport.
+    """
+    conn = user_db.connect_db()
+    shared = email_filter is None
+    if shared:
+        email_filter = user_db.email_filter()
+    report = ImportReport()
+
+    def insert(batch):
+        nonlocal email_filter
+        if email_filter is not None:
+            sized = _sized_filter(conn, email_filter, shared, len(batch))
+            if sized is not email_filter:
+                report.filter_rebuilds += 1
+                email_filter = sized
+        _insert_batch(conn, batch, report, sample_limit, duplicates_out, email_filter)
+
+    batch = []
+    start = time.perf_counter()
+    for row in rows:
+        report.read += 1
+        cleaned = clean_row(row)
+        if cleaned is None:
+            report.invalid += 1
+            continue
+        batch.append(cleaned)
+        if len(batch) >= batch_size:
+            insert(batch)
+            batch = []
+            report.seconds = time.perf_counter() - start
+            if progress:
+                progress(report)
+    if batch:
+        insert(batch)
+    if email_filter is not None:
+        report.filter_stats = email_filter.stats()
+    report.seconds = time.perf_counter() - start
+    if progress:
+        progress(report)
+    return report
+
+
+def print_progress(report):
+    sys.stdout.write(
+        f"\r⏳ {report.read:>10} rows | {report.inserted:>10} added | "
+        f"{report.duplicates:>8} duplicates | {report.rows_per_sec:>9.0f} rows/sec"
+    )
+    sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import users from CSV or JSONL.")
+    parser.add_argument("path", help="CSV with name,email,age columns, or JSONL")
+    parser.add_argument("--db", default=user_db.DB_PATH)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--duplicates", metavar="PATH", help="write every duplicate email to PATH")
+    parser.add_argument("--bloom", action="store_true",
+                        help="load a Bloom filter of existing emails to skip most lookups")
+    args = parser.parse_args()
+
+    user_db.configure(args.db)
+    if args.bloom:
+        user_db.enable_email_filter()
+    duplicates_out = open(args.duplicates, "w", encoding="utf-8") if args.duplicates else None
+    try:
+        report = import_users(
+            read_users(args.path), args.batch_size,
+            progress=print_progress, duplicates_out=duplicates_out,
+        )
+    finally:
+        if duplicates_out is not None:
+            duplicates_out.close()
+    print()
+    print(f"✅ Imported {report.inserted} of {report.read} rows in {report.seconds:.1f}s")
+    if report.duplicates:
+        print(f"❌ {report.duplicates} duplicate emails skipped, e.g. "
+              + ", ".join(report.duplicate_samples[:5]))
+    if report.invalid:
+        print(f"❌ {report.invalid} rows skipped (unparsable, missing name/email or bad age)")
+    if report.filter_stats is not None:
+        stats = report.filter_stats
+        print(f"Bloom filter: {report.filter_skipped} lookups skipped, "
+              f"false-positive rate {report.filter_fp_rate:.2%}, "
+              f"{stats['memory_bytes'] / 1024:.0f} KiB for {stats['emails']} emails "
+              f"({report.filter_rebuilds} rebuilds)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+changefeed.py
+
+Change-data-capture for the users table. Triggers append every insert,
+update and delete to users_changes with an AUTOINCREMENT seq; SQLite has
+one writer at a time, so seq order is commit order and a seq is never
+reused, even after compaction. Consumers keep a named cursor in the
+database and read "everything after my cursor".
+
+  python changefeed.py status
+  python changefeed.py export --consumer nightly --out changes.jsonl
+  python changefeed.py compact
+"""
+
+import argparse
+import json
+import sqlite3
+from dataclasses import asdict, dataclass
+
+
+CHANGEFEED_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS users_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        op TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        email TEXT,
+        old_email TEXT,
+        name TEXT,
+        age INTEGER,
+        changed_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS changefeed_consumers (
+        name TEXT PRIMARY KEY,
+        position INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_changes_insert AFTER INSERT ON users BEGIN
+        INSERT INTO users_changes (op, user_id, email, name, age)
+        VALUES ('insert', new.id, new.email, new.name, new.age);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_changes_update AFTER UPDATE ON users
+    WHEN old.name IS NOT new.name OR old.email IS NOT new.email OR old.age IS NOT new.age
+    BEGIN
+        INSERT INTO users_changes (op, user_id, email, old_email, name, age)
+        VALUES ('update', new.id, new.email,
+                CASE WHEN old.email IS NOT new.email THEN old.email END, new.name, new.age);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_changes_delete AFTER DELETE ON users BEGIN
+        INSERT INTO users_changes (op, user_id, email, name, age)
+        VALUES ('delete', old.id, old.email, old.name, old.age);
+    END
+    """,
+]
+
+
+@dataclass
+class Change:
+    seq: int
+    op: str             # "insert", "update" or "delete"
+    user_id: int
+    email: str
+    old_email: str      # previous email on updates that changed it, else None
+    name: str           # row after insert/update, row before delete
+    age: int
+    changed_at: float   # unix time
+
+
+def install_changefeed(conn):
+    with conn:
+        # databases set up before old_email was made conditional keep the old
+        # trigger under CREATE TRIGGER IF NOT EXISTS; replace it
+        row = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'users_changes_update'"
+        ).fetchone()
+        if row and "CASE WHEN" not in row[0]:
+            conn.execute("DROP TRIGGER users_changes_update")
+        for statement in CHANGEFEED_SCHEMA:
+            conn.execute(statement)
+
+
+def latest_seq(conn):
+    # from sqlite_sequence, so it stays right after compaction empties the log
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'users_changes'").fetchone()
+    return row[0] if row else 0
+
+
+def read_changes(conn, since=0, limit=1000):
+    """Up to limit changes with seq > since, oldest first."""
+    rows = conn.execute(
+        "SELECT seq, op, user_id, email, old_email, name, age, changed_at "
+        "FROM users_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+        (since, limit),
+    ).fetchall()
+    return [Change(*row) for row in rows]
+
+
+class ChangeConsumer:
+    """
+    A named, persistent cursor into the feed (at-least-once delivery):
+
+        consumer = ChangeConsumer(conn, "search-cache")
+        for batch in consumer.batches():
+            apply(batch)
+            consumer.commit(batch[-1].seq)
+
+    A crash between apply() and commit() replays the batch on restart.
+    A new consumer starts at 0, so it only sees changes not yet compacted;
+    to bootstrap, note latest_seq(conn), copy the users table, then reset() to it.
+    """
+
+    def __init__(self, conn, name):
+        self.conn = conn
+        self.name = name
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO changefeed_consumers (name, position) VALUES (?, 0)", (name,)
+            )
+
+    @property
+    def position(self):
+        return self.conn.execute(
+            "SELECT position FROM changefeed_consumers WHERE name = ?", (self.name,)
+        ).fetchone()[0]
+
+    def poll(self, limit=1000):
+        return read_changes(self.conn, self.position, limit)
+
+    def commit(self, seq):
+        """Mark everything up to seq as processed (a cursor never moves backwards)."""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE changefeed_consumers SET position = MAX(position, ?) WHERE name = ?",
+                (seq, self.name),
+            )
+
+    def batches(self, limit=1000):
+        """Yield batches until caught up; commit each one before asking for the next."""
+        since = self.position
+        while True:
+            batch = read_changes(self.conn, since, limit)
+            if not batch:
+                return
+            yield batch
+            since = batch[-1].seq
+
+    def lag(self):
+        return latest_seq(self.conn) - self.position
+
+    def reset(self, position=0):
+        """Move the cursor anywhere (e.g. back to 0 after a fresh full export)."""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE changefeed_consumers SET position = ? WHERE name = ?", (position, self.name)
+            )
+
+    def drop(self):
+        """Forget this consumer so it no longer holds back compaction."""
+        with self.conn:
+            self.conn.execute("DELETE FROM changefeed_consumers WHERE name = ?", (self.name,))
+
+
+def compact(conn):
+    """
+    Delete changes every consumer has processed. With no consumers registered
+    nothing is deleted (nobody has said what's safe). Returns rows deleted.
+    """
+    horizon = conn.execute("SELECT MIN(position) FROM changefeed_consumers").fetchone()[0]
+    if not horizon:
+        return 0
+    with conn:
+        return conn.execute("DELETE FROM users_changes WHERE seq <= ?", (horizon,)).rowcount
+
+
+def consumers(conn):
+    """[(name, position, lag)] for every registered consumer."""
+    latest = latest_seq(conn)
+    return [
+        (name, position, latest - position)
+        for name, position in conn.execute(
+            "SELECT name, position FROM changefeed_consumers ORDER BY name"
+        )
+    ]
+
+
+def export_changes(consumer, out, batch_size=5000):
+    """Append the consumer's unread changes to out as JSON lines. Returns how many."""
+    written = 0
+    for batch in consumer.batches(batch_size):
+        out.write("".join(json.dumps(asdict(change)) + "\n" for change in batch))
+        out.flush()
+        consumer.commit(batch[-1].seq)
+        written += len(batch)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="users table change feed.")
+    parser.add_argument("--db", default="users.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="latest seq and each consumer's lag")
+    export = sub.add_parser("export", help="append unread changes to a JSONL file")
+    export.add_argument("--consumer", required=True)
+    export.add_argument("--out", required=True)
+    sub.add_parser("compact", help="delete changes every consumer has read")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        install_changefeed(conn)
+        if args.command == "status":
+            print(f"Latest seq: {latest_seq(conn)}")
+            for name, position, lag in consumers(conn):
+                print(f"  {name:<20} at {position:>10}  lag {lag}")
+        elif args.command == "export":
+            with open(args.out, "a", encoding="utf-8") as out:
+                written = export_changes(ChangeConsumer(conn, args.consumer), out)
+            print(f"✅ Exported {written} changes to {args.out}")
+        else:
+            print(f"✅ Compacted {compact(conn)} consumed changes")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
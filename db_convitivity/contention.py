@@ -0,0 +1,167 @@
+"""
+contention.py
+
+Busy-retry with exponential backoff for SQLite writes, plus counters for
+retries and optimistic-concurrency (version CAS) conflicts.
+
+Stress test: several processes increment the same few users' age through
+compare-and-swap; with CAS no increment is lost.
+
+  python contention.py --procs 4 --increments 500 --hot-users 4
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+
+
+def is_busy(error):
+    """True for "database is locked"/"busy" errors, the ones worth retrying."""
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (SQLITE_BUSY, SQLITE_LOCKED)
+    text = str(error)
+    return "locked" in text or "busy" in text
+
+
+class ContentionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.busy_retries = 0
+        self.busy_failures = 0
+        self.cas_conflicts = 0
+        self.cas_updates = 0
+        self.backoff_seconds = 0.0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self):
+        with self._lock:
+            attempts = self.cas_updates + self.cas_conflicts
+            return {
+                "busy_retries": self.busy_retries,
+                "busy_failures": self.busy_failures,
+                "backoff_seconds": round(self.backoff_seconds, 4),
+                "cas_updates": self.cas_updates,
+                "cas_conflicts": self.cas_conflicts,
+                "conflict_rate": round(self.cas_conflicts / attempts, 4) if attempts else 0.0,
+            }
+
+
+class RetryPolicy:
+    """
+    Re-run a write when SQLite reports the database busy/locked, sleeping
+    base_delay * 2**attempt (capped at max_delay, with full jitter so
+    competing processes don't retry in lockstep).
+    The connection's own busy timeout still applies to each attempt.
+    """
+
+    def __init__(self, max_attempts=8, base_delay=0.005, max_delay=0.5, stats=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = stats if stats is not None else ContentionStats()
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def run(self, conn, func):
+        """func(conn) inside its own transaction, retried on busy; returns its result."""
+        for attempt in range(self.max_attempts):
+            try:
+                with conn:
+                    return func(conn)
+            except sqlite3.OperationalError as error:
+                if not is_busy(error):
+                    raise
+                if attempt == self.max_attempts - 1:
+                    self.stats.add(busy_failures=1)
+                    raise
+                pause = self.delay(attempt)
+                self.stats.add(busy_retries=1, backoff_seconds=pause)
+                time.sleep(pause)
+
+
+# -------- Stress test --------
+def _worker(path, emails, increments, seed, results):
+    import user_db
+
+    user_db.configure(path, timeout=0.05)  # short busy timeout: let the retry policy do the waiting
+    user_db.configure_cache(max_entries=0)
+    rng = random.Random(seed)
+    done = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        while done < increments:
+            email = rng.choice(emails)
+            user = user_db.find_user_by_email(email)
+            if user_db.update_user_if_version(email, user[1], user[3] + 1, user[4]):
+                done += 1
+    results.put(user_db.contention_stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process CAS update stress test.")
+    parser.add_argument("--procs", type=int, default=4)
+    parser.add_argument("--increments", type=int, default=500, help="per process")
+    parser.add_argument("--hot-users", type=int, default=4)
+    args = parser.parse_args()
+
+    import user_db
+    from database import create_db
+
+    with tempfile.TemporaryDirectory(dir=".") as directory:
+        path = os.path.join(directory, "contention.db")
+        create_db(path)
+        user_db.configure(path)
+        emails = [f"hot{i}@example.com" for i in range(args.hot_users)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            for email in emails:
+                user_db.add_user("Hot", email, 0)
+
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(
+                target=_worker, args=(path, emails, args.increments, seed, results)
+            )
+            for seed in range(args.procs)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        stats = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        seconds = time.perf_counter() - start
+
+        user_db.configure_cache(max_entries=0)
+        total = sum(user_db.find_user_by_email(email)[3] for email in emails)
+        expected = args.procs * args.increments
+        user_db.configure(user_db.DB_PATH)
+
+    print("=" * 50)
+    print(f"Increments applied : {total} of {expected} {'✅' if total == expected else '❌'}")
+    print(f"Throughput         : {expected / seconds:.0f} updates/sec")
+    for name in stats[0]:
+        if name != "conflict_rate":
+            print(f"{name:<19}: {sum(s[name] for s in stats):g}")
+    conflicts = sum(s["cas_conflicts"] for s in stats)
+    print(f"{'conflict_rate':<19}: {conflicts / (conflicts + expected):.2%}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
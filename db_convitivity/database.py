@@ -1,8 +1,19 @@
 import sqlite3
  
+from changefeed import install_changefeed
+from user_search import install_search
  
-def create_db():
-    conn = sqlite3.connect("users.db")
+ 
+def migrate_version_column(conn):
+    # row version for optimistic concurrency (update_user_if_version); older files lack it
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(users)")]
+    if "version" not in columns:
+        conn.execute("ALTER TABLE users ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        conn.commit()
+ 
+ 
+def create_db(path="users.db"):
+    conn = sqlite3.connect(path)
     cursor = conn.cursor()
  
     cursor.execute("""
@@ -15,6 +26,12 @@ def create_db():
     """)
  
     conn.commit()
+    migrate_version_column(conn)
+ 
+    # name/email full-text index, kept in sync by triggers
+    install_search(conn)
+    # users_changes log for incremental consumers (see changefeed.py)
+    install_changefeed(conn)
     conn.close()
  
  
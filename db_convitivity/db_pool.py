@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import threading
+
+from query_stats import connect as instrumented_connect
+
+
+# Tuned defaults: WAL lets readers run alongside the writer, synchronous=NORMAL
+# is crash-safe in WAL mode, and a bigger page cache + mmap avoid read syscalls.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "cache_size": -20000,       # negative = KiB, so ~20 MB
+    "mmap_size": 268435456,     # 256 MB
+    "temp_store": "memory",
+    "foreign_keys": "on",
+}
+
+# Old behaviour (sqlite3 defaults), handy for comparisons.
+SQLITE_DEFAULT_PRAGMAS = {
+    "journal_mode": "delete",
+    "synchronous": "full",
+}
+
+ALLOWED_PRAGMAS = {
+    "journal_mode", "synchronous", "cache_size", "mmap_size",
+    "temp_store", "foreign_keys", "busy_timeout", "wal_autocheckpoint",
+}
+
+
+# -------- Custom Exceptions --------
+class PoolError(Exception):
+    """Raised for invalid pool configuration."""
+
+
+def _pragma_value(value):
+    # Pragmas can't be bound as parameters, so only allow ints and plain words.
+    if isinstance(value, bool):
+        return "on" if value else "off"
+    if isinstance(value, int):
+        return str(value)
+    text = str(value).strip()
+    if not text.isalnum():
+        raise PoolError(f"Invalid pragma value: {value!r}")
+    return text
+
+
+def _close(conn):
+    try:
+        conn.close()
+    except sqlite3.ProgrammingError:
+        pass
+
+
+class ConnectionPool:
+    """
+    One long-lived sqlite3 connection per thread (per process), opened lazily
+    and reused, instead of connect()/close() around every query.
+    Connections of threads that have exited are closed the next time any
+    thread opens one, so thread-per-request servers don't leak handles.
+    """
+
+    def __init__(self, path="users.db", pragmas=None, timeout=5.0, query_stats=None):
+        self.path = path
+        self.timeout = timeout
+        self.query_stats = query_stats  # QueryStats to record every statement into, if any
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        for name in self.pragmas:
+            if name not in ALLOWED_PRAGMAS:
+                raise PoolError(f"Unsupported pragma: {name}")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []  # [(thread that opened it, connection)]
+        self._pid = os.getpid()
+        self.opened = 0
+        self.reaped = 0
+
+    def _open(self):
+        if self.query_stats is not None:
+            conn = instrumented_connect(
+                self.path, self.query_stats, timeout=self.timeout, check_same_thread=False
+            )
+        else:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {_pragma_value(value)}").fetchall()
+        with self._lock:
+            dead = [conn for thread, conn in self._connections if not thread.is_alive()]
+            self._connections = [
+                (thread, conn) for thread, conn in self._connections if thread.is_alive()
+            ]
+            self._connections.append((threading.current_thread(), conn))
+            self.opened += 1
+            self.reaped += len(dead)
+        for old in dead:
+            _close(old)
+        return conn
+
+    def connection(self):
+        """This thread's connection (created on first use)."""
+        if os.getpid() != self._pid:
+            # forked child: never share the parent's SQLite handles
+            self._local = threading.local()
+            self._connections = []
+            self._pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+        return conn
+
+    def close_all(self):
+        """Close every pooled connection (threads reopen on next use)."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for _, conn in connections:
+            _close(conn)
+        self._local = threading.local()
+
+    def settings(self):
+        conn = self.connection()
+        return {
+            name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+            for name in self.pragmas
+        }
@@ -0,0 +1,181 @@
+"""
+email_bloom.py
+
+Bloom filter of known emails. "Not in the filter" means certainly not in
+users, so bulk onboarding can skip the SQLite duplicate lookup for those
+emails and only check the few the filter says "maybe" to.
+
+Deletes can't be removed from a Bloom filter; a deleted email just stays a
+"maybe" (costs one extra lookup, never a wrong answer). needs_rebuild()
+says when deletes or growth have pushed the false-positive rate up.
+
+  python email_bloom.py --db users.db --error-rate 0.01
+"""
+
+import argparse
+import math
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+
+class EmailBloom:
+    """
+    Bloom filter sized for `capacity` emails at `error_rate` false positives.
+    Positions come from Python's str hash, which is cheap but salted per
+    process, so a filter is always built in-process and never saved.
+    update()/contains_many() work on whole batches with NumPy.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self._steps = np.arange(self.hashes, dtype=np.uint64)
+        self.count = 0      # emails added
+        self.deleted = 0    # emails deleted since the last (re)build
+
+    # double hashing: k positions from the two 32-bit halves of one 64-bit hash
+    def _positions(self, email):
+        h = hash(email) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def _batch_positions(self, emails):
+        h = np.fromiter((hash(email) for email in emails), dtype=np.int64).view(np.uint64)
+        h1 = h & np.uint64(0xFFFFFFFF)
+        h2 = (h >> np.uint64(32)) | np.uint64(1)
+        return (h1[:, None] + self._steps * h2[:, None]) % np.uint64(self.size)
+
+    def add(self, email):
+        bits = self.bits
+        for pos in self._positions(email):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def update(self, emails):
+        emails = list(emails)
+        if not emails:
+            return
+        pos = self._batch_positions(emails).ravel()
+        masks = np.left_shift(np.uint8(1), (pos & np.uint64(7)).astype(np.uint8))
+        np.bitwise_or.at(self.bits, pos >> np.uint64(3), masks)
+        self.count += len(emails)
+
+    def discard(self, email):
+        """Record a delete; the email's bits stay set (see needs_rebuild)."""
+        self.deleted += 1
+
+    def __contains__(self, email):
+        bits = self.bits
+        for pos in self._positions(email):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def contains_many(self, emails):
+        """Boolean array: True where the email may be known, False where it certainly isn't."""
+        emails = list(emails)
+        if not emails:
+            return np.zeros(0, dtype=bool)
+        pos = self._batch_positions(emails)
+        found = (self.bits[pos >> np.uint64(3)] >> (pos & np.uint64(7)).astype(np.uint8)) & 1
+        return found.all(axis=1)
+
+    # -------- Health --------
+    @property
+    def memory_bytes(self):
+        return self.bits.nbytes
+
+    def fill_ratio(self):
+        return int(np.unpackbits(self.bits).sum()) / self.size
+
+    def expected_fp_rate(self):
+        """False-positive rate implied by how many emails were added."""
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+    def needs_rebuild(self, max_deleted_fraction=0.1, incoming=0):
+        """True once deletes or growth (plus `incoming` emails about to be added) exceed the sizing."""
+        return (self.count + incoming > self.capacity
+                or self.deleted > self.count * max_deleted_fraction)
+
+    def stats(self):
+        return {
+            "emails": self.count,
+            "deleted": self.deleted,
+            "capacity": self.capacity,
+            "bits": self.size,
+            "hashes": self.hashes,
+            "memory_bytes": self.memory_bytes,
+            "bytes_per_email": round(self.memory_bytes / self.count, 2) if self.count else 0.0,
+            "expected_fp_rate": round(self.expected_fp_rate(), 5),
+            "needs_rebuild": self.needs_rebuild(),
+        }
+
+
+def load_email_bloom(conn, error_rate=0.01, headroom=2.0, extra=0):
+    """Filter holding every email in users, sized for headroom x (today's count + extra)."""
+    total = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    bloom = EmailBloom(max((total + extra) * headroom, 1000), error_rate)
+    cursor = conn.execute("SELECT email FROM users")
+    while True:
+        rows = cursor.fetchmany(50000)
+        if not rows:
+            return bloom
+        bloom.update(row[0] for row in rows)
+
+
+def measure_fp_rate(bloom, conn, samples=100000):
+    """Observed false-positive rate over made-up emails that aren't in users."""
+    probes = [f"probe-{i}@bloom.invalid" for i in range(samples)]
+    hits = [email for email, maybe in zip(probes, bloom.contains_many(probes)) if maybe]
+    real = 0
+    for start in range(0, len(hits), 900):
+        chunk = hits[start:start + 900]
+        marks = ",".join("?" * len(chunk))
+        real += conn.execute(f"SELECT COUNT(*) FROM users WHERE email IN ({marks})", chunk).fetchone()[0]
+    return (len(hits) - real) / (samples - real)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an email Bloom filter and report on it.")
+    parser.add_argument("--db", default="users.db")
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--samples", type=int, default=100000)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        start = time.perf_counter()
+        bloom = load_email_bloom(conn, args.error_rate)
+        load_sec = time.perf_counter() - start
+
+        emails = {row[0] for row in conn.execute("SELECT email FROM users")}
+        set_bytes = sys.getsizeof(emails) + sum(sys.getsizeof(email) for email in emails)
+
+        start = time.perf_counter()
+        observed = measure_fp_rate(bloom, conn, args.samples)
+        probe_us = (time.perf_counter() - start) / args.samples * 1e6
+    finally:
+        conn.close()
+
+    stats = bloom.stats()
+    print("=" * 50)
+    print(f"Emails loaded      : {stats['emails']} in {load_sec:.2f}s")
+    print(f"Bits / hashes      : {stats['bits']} / {stats['hashes']}")
+    print(f"Filter memory      : {stats['memory_bytes'] / 1024:.1f} KiB "
+          f"({stats['bytes_per_email']} bytes/email)")
+    print(f"Python set memory  : {set_bytes / 1024:.1f} KiB")
+    print(f"Expected FP rate   : {stats['expected_fp_rate']:.3%}")
+    print(f"Observed FP rate   : {observed:.3%} over {args.samples} unknown emails")
+    print(f"Lookup             : {probe_us:.2f} µs/email")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
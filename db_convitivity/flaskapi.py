@@ -1,4 +1,6 @@
-from flask import Flask,jsonify
+from flask import Flask,jsonify,request
+
+from user_db import get_users_page, search_users
 
 class Food:
     def __init__(self,id,food_name,price):
@@ -32,5 +34,24 @@ def display_food_items():
 def display_food():
     return jsonify(Food(101,"burger",100).to_dict())
 
+@app.route("/users")
+def list_users():
+    # keyset pagination: pass next_page_token back as ?page_token=... for the next page
+    try:
+        rows, next_token = get_users_page(
+            request.args.get("page_token"), request.args.get("limit", 100, type=int)
+        )
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+    users = [{"id": r[0], "name": r[1], "email": r[2], "age": r[3]} for r in rows]
+    return jsonify({"users": users, "next_page_token": next_token})
+
+@app.route("/users/search")
+def search_users_route():
+    # ?q=rash nad -> users whose name/email words start with "rash" and "nad"
+    rows = search_users(request.args.get("q", ""), request.args.get("limit", 20, type=int))
+    users = [{"id": r[0], "name": r[1], "email": r[2], "age": r[3]} for r in rows]
+    return jsonify({"users": users})
+
 if __name__ == "__main__":
     app.run(debug=True)
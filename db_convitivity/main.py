@@ -1,10 +1,12 @@
+import itertools
+
 from database import create_db
 
 from user_db import (
 
     add_user,
 
-    get_all_users,
+    iter_users,
 
     find_user_by_email,
 
@@ -17,9 +19,11 @@ from user_db import (
  
 def show_users():
 
-    users = get_all_users()
+    users = iter_users()
  
-    if not users:
+    first = next(users, None)
+
+    if first is None:
 
         print("❌ No users found")
 
@@ -27,7 +31,7 @@ def show_users():
  
     print("\n--- USER LIST ---")
 
-    for u in users:
+    for u in itertools.chain([first], users):
 
         print(f"ID:{u[0]} | Name:{u[1]} | Email:{u[2]} | Age:{u[3]}")
  
@@ -0,0 +1,284 @@
+"""
+query_stats.py
+
+Query instrumentation for sqlite3: per-statement call counts, row counts and
+latency histograms, plus a slow-query log that captures EXPLAIN QUERY PLAN.
+
+  stats = QueryStats(slow_ms=25)
+  conn = connect("users.db", stats)      # or ConnectionPool(..., query_stats=stats)
+  ...
+  print(stats.report())
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+# Upper bounds (ms) of the latency buckets; the last bucket is everything slower.
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_SPACES = re.compile(r"\s+")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normalize(sql):
+    """One key per statement shape: collapsed whitespace, IN (?, ?, ...) lists folded."""
+    sql = _SPACES.sub(" ", sql).strip()
+    return _PARAM_LIST.sub("(?, ...)", sql)
+
+
+class StatementStats:
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms, rows):
+        self.calls += 1
+        self.rows += rows
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    def percentile(self, pct):
+        """Bucket upper bound that pct% of calls fall under, never above the slowest call."""
+        wanted = self.calls * pct / 100
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min(BUCKETS_MS[i], self.max_ms) if i < len(BUCKETS_MS) else self.max_ms
+        return 0.0
+
+
+class QueryStats:
+    """
+    Thread-safe collector shared by any number of instrumented connections.
+    Statements slower than slow_ms go to a bounded slow log; the query plan
+    is captured once per statement shape (explain=False turns that off).
+    """
+
+    def __init__(self, slow_ms=100.0, slow_log_size=200, explain=True):
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.slow_log = deque(maxlen=slow_log_size)
+        self.plans = {}
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def record(self, conn, sql, params, ms, rows):
+        key = normalize(sql)
+        with self._lock:
+            entry = self._statements.get(key)
+            if entry is None:
+                entry = self._statements[key] = StatementStats(key)
+            entry.add(ms, rows)
+            if ms < self.slow_ms:
+                return
+            need_plan = self.explain and key not in self.plans
+            if need_plan:
+                self.plans[key] = None  # claim it so other threads don't also explain
+        if need_plan:
+            plan = explain_plan(conn, sql, params)
+            with self._lock:
+                self.plans[key] = plan
+        with self._lock:
+            self.slow_log.append((time.time(), round(ms, 3), rows, key, params))
+
+    def statements(self):
+        """StatementStats for every statement seen, most total time first."""
+        with self._lock:
+            return sorted(self._statements.values(), key=lambda s: s.total_ms, reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self.slow_log.clear()
+            self.plans.clear()
+
+    # -------- Report --------
+    def report(self, top=20):
+        lines = ["=" * 100, "QUERY STATS", "-" * 100]
+        lines.append(
+            f"{'Calls':>8} {'Rows':>10} {'Total ms':>11} {'Avg ms':>9} {'p50':>7} "
+            f"{'p95':>7} {'p99':>7} {'Max ms':>9}  Statement"
+        )
+        statements = self.statements()
+        for s in statements[:top]:
+            lines.append(
+                f"{s.calls:>8} {s.rows:>10} {s.total_ms:>11.2f} {s.avg_ms:>9.3f} "
+                f"{s.percentile(50):>7g} {s.percentile(95):>7g} {s.percentile(99):>7g} "
+                f"{s.max_ms:>9.3f}  {s.sql[:80]}"
+            )
+
+        lines += ["-" * 100, "LATENCY HISTOGRAMS (calls per bucket, upper bound in ms)"]
+        labels = [f"<={b:g}" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]:g}"]
+        for s in statements[:5]:
+            lines.append(f"  {s.sql[:90]}")
+            width = max(s.buckets)
+            for label, count in zip(labels, s.buckets):
+                if count:
+                    bar = "#" * max(1, round(40 * count / width))
+                    lines.append(f"    {label:>8} {count:>8} {bar}")
+
+        lines += ["-" * 100, f"SLOW QUERIES (>= {self.slow_ms:g} ms, newest last)"]
+        with self._lock:
+            slow = list(self.slow_log)
+            plans = dict(self.plans)
+        for at, ms, rows, key, params in slow:
+            stamp = time.strftime("%H:%M:%S", time.localtime(at))
+            lines.append(f"  {stamp} {ms:>9.3f} ms {rows:>8} rows  {key[:70]}  {_short(params)}")
+        if plans:
+            lines += ["-" * 100, "QUERY PLANS (slow statements)"]
+            for key, plan in plans.items():
+                lines.append(f"  {key[:90]}")
+                for step in plan or ["(no plan captured)"]:
+                    lines.append(f"    {step}")
+        lines.append("=" * 100)
+        return "\n".join(lines)
+
+    def write_report(self, path, top=20):
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(self.report(top) + "\n")
+
+
+def _short(params, limit=60):
+    text = repr(params)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def explain_plan(conn, sql, params):
+    """EXPLAIN QUERY PLAN lines for sql, or [] for statements that can't be explained."""
+    try:
+        # a plain cursor, so the EXPLAIN itself isn't recorded
+        cursor = sqlite3.Cursor(conn)
+        rows = cursor.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        cursor.close()
+    except sqlite3.Error:
+        return []
+    return [row[-1] for row in rows]
+
+
+# -------- Instrumented connection --------
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Times each statement from execute() until its rows are used up (or the
+    cursor is re-executed, closed or dropped), so fetch time counts too.
+    """
+
+    _pending = None
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, params, elapsed, rows = pending
+            self.connection.stats.record(self.connection, sql, params, elapsed * 1000, rows)
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        elapsed = time.perf_counter() - start
+        rows = self.rowcount if self.rowcount > 0 else 0
+        self._pending = [sql, parameters, elapsed, rows]
+        if self.description is None:
+            self._finish()  # not a query: nothing left to fetch
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        seq_of_parameters = list(seq_of_parameters)
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        elapsed = time.perf_counter() - start
+        first = seq_of_parameters[0] if seq_of_parameters else ()
+        self._pending = [sql, first, elapsed, max(self.rowcount, 0)]
+        self._finish()
+        return self
+
+    def _fetched(self, start, count, done):
+        pending = self._pending
+        if pending is not None:
+            pending[2] += time.perf_counter() - start
+            pending[3] += count
+            if done:
+                self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        size = self.arraysize if size is None else size
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3.Connection whose statements are recorded into self.stats."""
+
+    stats = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # Connection.execute() doesn't go through Cursor.execute(), so route it explicitly.
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connect(path, stats, **kwargs):
+    """sqlite3.connect() that records every statement into stats."""
+    conn = sqlite3.connect(path, factory=InstrumentedConnection, **kwargs)
+    conn.stats = stats
+    return conn
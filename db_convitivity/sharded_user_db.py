@@ -0,0 +1,330 @@
+"""
+sharded_user_db.py
+
+The user_db API over N SQLite files. Each email lives in exactly one shard
+(stable CRC32 of the email), so signups for different shards take different
+write locks and scans run on all shards in parallel.
+
+  python sharded_user_db.py reshard --source users.db --to shards/ --shards 8
+  python sharded_user_db.py reshard --source old_shards/ --to shards16/ --shards 16
+  python sharded_user_db.py stats shards/
+  python sharded_user_db.py bench --shards 8 --threads 8 --users 20000
+
+User ids come from each shard's own AUTOINCREMENT, so they are only unique
+within a shard; the email is the global key.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from database import create_db
+from db_pool import DEFAULT_PRAGMAS, ConnectionPool
+from user_db import MAX_SQL_PARAMS
+
+
+LAYOUT_FILE = "layout.json"
+
+
+# -------- Custom Exceptions --------
+class ShardLayoutError(Exception):
+    """Raised when a directory's shard layout doesn't match what was asked for."""
+
+
+def shard_for(email, shards):
+    # crc32 rather than hash(): str hashes are salted per process
+    return zlib.crc32(email.encode("utf-8")) % shards
+
+
+def shard_path(directory, index, shards):
+    return os.path.join(directory, f"users.{index:03d}-of-{shards:03d}.db")
+
+
+def read_layout(directory):
+    """Shard count recorded in directory, or None if it holds no sharded store."""
+    try:
+        with open(os.path.join(directory, LAYOUT_FILE), encoding="utf-8") as file:
+            return json.load(file)["shards"]
+    except FileNotFoundError:
+        return None
+
+
+class ShardedUserStore:
+    """
+    Same operations as user_db, routed to users.NNN-of-MMM.db files in directory.
+    Writers to one shard are serialised by an in-process lock per shard, so
+    threads queue on that instead of spinning on SQLite's busy timeout.
+    """
+
+    def __init__(self, directory, shards=None, pragmas=None, timeout=5.0, max_workers=None):
+        os.makedirs(directory, exist_ok=True)
+        existing = read_layout(directory)
+        if shards is None:
+            shards = existing or 4
+        if existing is not None and existing != shards:
+            raise ShardLayoutError(
+                f"{directory} holds {existing} shards, not {shards}; reshard it instead"
+            )
+        if shards < 1:
+            raise ShardLayoutError("Need at least one shard")
+        if existing is None:
+            with open(os.path.join(directory, LAYOUT_FILE), "w", encoding="utf-8") as file:
+                json.dump({"shards": shards}, file)
+
+        self.directory = directory
+        self.shards = shards
+        self.paths = [shard_path(directory, i, shards) for i in range(shards)]
+        for path in self.paths:
+            create_db(path)
+        self._pools = [ConnectionPool(path, pragmas=pragmas, timeout=timeout) for path in self.paths]
+        self._write_locks = [threading.Lock() for _ in range(shards)]
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or shards, thread_name_prefix="user-shard"
+        )
+
+    def shard_of(self, email):
+        return shard_for(email, self.shards)
+
+    def connection(self, index):
+        return self._pools[index].connection()
+
+    def map_shards(self, func):
+        """[func(connection, index) for every shard], run in parallel."""
+        def run(index):
+            return func(self.connection(index), index)
+        return list(self._executor.map(run, range(self.shards)))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for pool in self._pools:
+            pool.close_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------- CREATE --------
+    def add_user(self, name, email, age):
+        index = self.shard_of(email)
+        conn = self.connection(index)
+        with self._write_locks[index]:
+            try:
+                conn.execute(
+                    "INSERT INTO users (name, email, age) VALUES (?, ?, ?)", (name, email, age)
+                )
+                conn.commit()
+                print("✅ User added successfully")
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                print("❌ Email already exists")
+
+    def add_users(self, rows):
+        """Insert many (name, email, age) rows, one transaction per shard. Returns rows added."""
+        by_shard = [[] for _ in range(self.shards)]
+        for row in rows:
+            by_shard[self.shard_of(row[1])].append(row)
+
+        def insert(conn, index):
+            if not by_shard[index]:
+                return 0
+            with self._write_locks[index]:
+                with conn:
+                    return conn.executemany(
+                        "INSERT OR IGNORE INTO users (name, email, age) VALUES (?, ?, ?)",
+                        by_shard[index],
+                    ).rowcount
+
+        return sum(self.map_shards(insert))
+
+    # -------- READ --------
+    def get_all_users(self):
+        """Every user, shard by shard (each shard in id order)."""
+        results = self.map_shards(lambda conn, _: conn.execute("SELECT * FROM users").fetchall())
+        return [row for rows in results for row in rows]
+
+    def iter_users(self, chunk_size=1000):
+        """Yield every user shard by shard with keyset queries, like user_db.iter_users."""
+        for index in range(self.shards):
+            conn = self.connection(index)
+            last_id = 0
+            while True:
+                rows = conn.execute(
+                    "SELECT * FROM users WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunk_size)
+                ).fetchall()
+                yield from rows
+                if len(rows) < chunk_size:
+                    break
+                last_id = rows[-1][0]
+
+    def count_users(self):
+        return self.map_shards(lambda conn, _: conn.execute("SELECT COUNT(*) FROM users").fetchone()[0])
+
+    def find_user_by_email(self, email):
+        conn = self.connection(self.shard_of(email))
+        return conn.execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
+
+    def find_users_by_email(self, emails):
+        """{email: row or None}; each shard answers its own emails in parallel."""
+        by_shard = [[] for _ in range(self.shards)]
+        for email in dict.fromkeys(emails):
+            by_shard[self.shard_of(email)].append(email)
+
+        def lookup(conn, index):
+            found = {}
+            wanted = by_shard[index]
+            for start in range(0, len(wanted), MAX_SQL_PARAMS):
+                chunk = wanted[start:start + MAX_SQL_PARAMS]
+                marks = ",".join("?" * len(chunk))
+                for row in conn.execute(f"SELECT * FROM users WHERE email IN ({marks})", chunk):
+                    found[row[2]] = row
+            return found
+
+        found = dict.fromkeys(email for wanted in by_shard for email in wanted)
+        for result in self.map_shards(lookup):
+            found.update(result)
+        return found
+
+    # -------- UPDATE --------
+    def update_user(self, email, new_name, new_age):
+        index = self.shard_of(email)
+        conn = self.connection(index)
+        with self._write_locks[index]:
+            cursor = conn.execute(
+                "UPDATE users SET name = ?, age = ?, version = version + 1 WHERE email = ?",
+                (new_name, new_age, email),
+            )
+            conn.commit()
+
+        if cursor.rowcount:
+            print("✅ User updated successfully")
+        else:
+            print("❌ User not found")
+
+    # -------- DELETE --------
+    def delete_user(self, email):
+        index = self.shard_of(email)
+        conn = self.connection(index)
+        with self._write_locks[index]:
+            cursor = conn.execute("DELETE FROM users WHERE email = ?", (email,))
+            conn.commit()
+
+        if cursor.rowcount:
+            print("✅ User deleted successfully")
+        else:
+            print("❌ User not found")
+
+
+# -------- Resharding --------
+def source_files(source):
+    """SQLite files making up source: a single users.db or a sharded directory."""
+    if os.path.isdir(source):
+        shards = read_layout(source)
+        if shards is None:
+            raise ShardLayoutError(f"{source} has no {LAYOUT_FILE}")
+        return [shard_path(source, i, shards) for i in range(shards)]
+    return [source]
+
+
+def reshard(source, target, batch_size=5000, progress=None):
+    """
+    Copy every user from source (users.db or a sharded directory) into the
+    ShardedUserStore target. Rows already in the target are skipped, so an
+    interrupted run can simply be repeated. Returns the number of rows copied.
+    """
+    copied = 0
+    for path in source_files(source):
+        conn = sqlite3.connect(path)
+        try:
+            last_id = 0
+            while True:
+                rows = conn.execute(
+                    "SELECT id, name, email, age FROM users WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                ).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                copied += target.add_users([row[1:] for row in rows])
+                if progress:
+                    progress(copied)
+        finally:
+            conn.close()
+    return copied
+
+
+# -------- Benchmark --------
+def bench_signups(directory, shards, threads, users, pragmas=None):
+    # Shards pay off once commits wait on disk (synchronous=full): SQLite
+    # releases the GIL while syncing, so other shards keep committing.
+    # With synchronous=normal each commit is mostly CPU under the GIL.
+    store = ShardedUserStore(os.path.join(directory, f"bench_{shards}"), shards, pragmas=pragmas)
+    per_thread = users // threads
+
+    def signups(worker):
+        for i in range(per_thread):
+            store.add_user(f"User {worker}-{i}", f"user{worker}-{i}@example.com", 20 + i % 50)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        workers = [threading.Thread(target=signups, args=(w,)) for w in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        seconds = time.perf_counter() - start
+    store.close()
+    return per_thread * threads / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded user store tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    re_cmd = sub.add_parser("reshard", help="copy users into a new shard layout")
+    re_cmd.add_argument("--source", required=True, help="users.db or a sharded directory")
+    re_cmd.add_argument("--to", required=True, help="target directory")
+    re_cmd.add_argument("--shards", type=int, required=True)
+
+    stats_cmd = sub.add_parser("stats", help="rows per shard")
+    stats_cmd.add_argument("directory")
+
+    bench_cmd = sub.add_parser("bench", help="concurrent signups: 1 file vs N shards")
+    bench_cmd.add_argument("--shards", type=int, default=8)
+    bench_cmd.add_argument("--threads", type=int, default=8)
+    bench_cmd.add_argument("--users", type=int, default=20000)
+    bench_cmd.add_argument("--synchronous", default="full", choices=["off", "normal", "full"])
+    args = parser.parse_args()
+
+    if args.command == "reshard":
+        with ShardedUserStore(args.to, args.shards) as target:
+            start = time.perf_counter()
+            copied = reshard(args.source, target, progress=lambda n: print(f"\r⏳ {n} rows", end=""))
+            print(f"\n✅ Copied {copied} users into {args.shards} shards "
+                  f"in {time.perf_counter() - start:.1f}s")
+    elif args.command == "stats":
+        with ShardedUserStore(args.directory) as store:
+            counts = store.count_users()
+            for path, count in zip(store.paths, counts):
+                print(f"{os.path.basename(path):<24} {count:>10}")
+            print(f"{'total':<24} {sum(counts):>10}")
+    else:
+        pragmas = dict(DEFAULT_PRAGMAS, synchronous=args.synchronous)
+        with tempfile.TemporaryDirectory(dir=".") as directory:
+            print(f"{'Shards':>6} {'Signups/sec':>14}")
+            for shards in sorted({1, args.shards}):
+                rate = bench_signups(directory, shards, args.threads, args.users, pragmas)
+                print(f"{shards:>6} {rate:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+_MISSING = object()
+
+
+class UserCache:
+    """
+    Bounded LRU + TTL cache for user rows keyed by email.
+    Misses (email not in the table) can be cached too, with a shorter TTL.
+    Writes in this process invalidate entries; the TTL bounds how stale an
+    entry can get when another process changes the database.
+    """
+
+    def __init__(self, max_entries=10000, ttl=60.0, negative_ttl=5.0, cache_misses=True,
+                 clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache_misses = cache_misses
+        self._clock = clock
+        # email -> (row or None, expires_at); least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped by every invalidation; a read that raced with a write must not be cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, email):
+        """(True, row_or_None) on a hit, (False, generation) on a miss."""
+        with self._lock:
+            entry = self._entries.get(email, _MISSING)
+            if entry is not _MISSING:
+                row, expires_at = entry
+                if self._clock() < expires_at:
+                    self._entries.move_to_end(email)
+                    self.hits += 1
+                    if row is None:
+                        self.negative_hits += 1
+                    return True, row
+                del self._entries[email]
+            self.misses += 1
+            return False, self._generation
+
+    def store(self, email, row, generation):
+        """Cache a row read from the database, unless a write happened since lookup()."""
+        if self.max_entries <= 0 or (row is None and not self.cache_misses):
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            ttl = self.ttl if row is not None else self.negative_ttl
+            self._entries[email] = (row, self._clock() + ttl)
+            self._entries.move_to_end(email)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *emails):
+        with self._lock:
+            self._generation += 1
+            for email in emails:
+                if self._entries.pop(email, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "negative_hits": self.negative_hits,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
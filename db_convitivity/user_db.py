@@ -1,125 +1,308 @@
+import atexit
 import sqlite3
- 
- 
-def connect_db():
 
-    return sqlite3.connect("users.db")
- 
- 
-# -------- CREATE --------
+from contention import RetryPolicy
+from db_pool import ConnectionPool
+from email_bloom import load_email_bloom
+from query_stats import QueryStats
+from user_cache import UserCache
+from user_search import search_users as _search_users
+from write_behind import DELETE, WriteBehindQueue
 
-def add_user(name, email, age):
 
-    try:
+DB_PATH = "users.db"
+MAX_SQL_PARAMS = 900  # stay under SQLite's host-parameter limit on old builds
 
-        conn = connect_db()
+_pool = ConnectionPool(DB_PATH)
+_cache = UserCache()
+_write_behind = None  # WriteBehindQueue while write-behind mode is on
+_retry = RetryPolicy()
+_email_filter = None  # EmailBloom of known emails, once enable_email_filter() is called
 
-        cursor = conn.cursor()
- 
-        cursor.execute(
 
-            "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+def configure(path=DB_PATH, pragmas=None, timeout=5.0, query_stats=None):
+    """Point the module at another database file and/or pragma settings."""
+    global _pool
+    flush_writes()
+    _pool.close_all()
+    _pool = ConnectionPool(path, pragmas=pragmas, timeout=timeout, query_stats=query_stats)
+    _cache.clear()
+    if _email_filter is not None:
+        enable_email_filter(_email_filter.error_rate)
+    return _pool
+
+
+def enable_query_stats(slow_ms=50.0, explain=True):
+    """Reopen the pool with instrumented connections; returns the QueryStats collector."""
+    stats = QueryStats(slow_ms=slow_ms, explain=explain)
+    configure(_pool.path, _pool.pragmas, _pool.timeout, query_stats=stats)
+    return stats
+
+
+def query_report(top=20):
+    """Text report of query timings, or None when instrumentation is off."""
+    stats = _pool.query_stats
+    return stats.report(top) if stats is not None else None
+
+
+def configure_cache(max_entries=10000, ttl=60.0, negative_ttl=5.0, cache_misses=True):
+    """Replace the find_user_by_email cache (max_entries=0 turns caching off)."""
+    global _cache
+    _cache = UserCache(max_entries, ttl, negative_ttl, cache_misses)
+    return _cache
+
+
+def cache_stats():
+    return _cache.stats()
+
+
+def invalidate_cached(*emails):
+    """Drop cached lookups for emails changed outside this module (e.g. bulk import)."""
+    _cache.invalidate(*emails)
 
-            (name, email, age)
 
-        )
- 
-        conn.commit()
+def configure_retry(max_attempts=8, base_delay=0.005, max_delay=0.5):
+    """Busy/locked retry settings for writes (contention counters carry over)."""
+    global _retry
+    _retry = RetryPolicy(max_attempts, base_delay, max_delay, stats=_retry.stats)
+    return _retry
 
+
+def contention_stats():
+    """Busy retries/failures and version-conflict counts since start."""
+    return _retry.stats.snapshot()
+
+
+def enable_email_filter(error_rate=0.01, extra=0):
+    """
+    (Re)load a Bloom filter of every email, with room for `extra` more;
+    add_user/delete_user keep it current.
+    """
+    global _email_filter
+    flush_writes()
+    _email_filter = load_email_bloom(connect_db(), error_rate, extra=extra)
+    return _email_filter
+
+
+def email_filter():
+    """The EmailBloom from enable_email_filter(), rebuilt first if it has gone stale."""
+    if _email_filter is not None and _email_filter.needs_rebuild():
+        enable_email_filter(_email_filter.error_rate)
+    return _email_filter
+
+
+def connect_db():
+    # Pooled: each thread reuses its own connection, so callers must not close it.
+    return _pool.connection()
+
+
+# -------- WRITE-BEHIND --------
+def enable_write_behind(batch_size=500, flush_interval=0.05):
+    """
+    Queue update_user/delete_user instead of committing each one.
+    Changes to the same email coalesce; a background thread writes them in
+    batched transactions. Call flush_writes() when they must be on disk.
+    """
+    global _write_behind
+    if _write_behind is None:
+        _write_behind = WriteBehindQueue(connect_db, batch_size, flush_interval)
+        _write_behind.on_committed = lambda emails: _cache.invalidate(*emails)
+        atexit.register(disable_write_behind)
+    return _write_behind
+
+
+def disable_write_behind():
+    """Write out everything still queued and go back to immediate commits."""
+    global _write_behind
+    queue, _write_behind = _write_behind, None
+    if queue is not None:
+        queue.close()
+
+
+def flush_writes(timeout=None):
+    """
+    Durability hook: block until queued changes are written. False on timeout,
+    or when some were dead-lettered (see _write_behind.dead_letters).
+    """
+    if _write_behind is None:
+        return True
+    return _write_behind.flush(timeout)
+
+
+def _apply_pending(email, user):
+    # read-your-writes: show queued changes on top of what the table has
+    op = _write_behind.pending_op(email) if _write_behind is not None else None
+    if op is None or user is None:
+        return user
+    if op[0] == DELETE:
+        return None
+    return (user[0], op[1], user[2], op[2]) + tuple(user[4:])
+
+
+# -------- CREATE --------
+def add_user(name, email, age):
+    if _write_behind is not None and _write_behind.pending_op(email) is not None:
+        _write_behind.flush()  # a queued delete must not land after this insert
+    conn = connect_db()
+    try:
+        _retry.run(conn, lambda c: c.execute(
+            "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+            (name, email, age)
+        ))
+        _cache.invalidate(email)
+        if _email_filter is not None:
+            _email_filter.add(email)
         print("✅ User added successfully")
- 
-    except sqlite3.IntegrityError:
 
+    except sqlite3.IntegrityError:
         print("❌ Email already exists")
- 
-    finally:
 
-        conn.close()
- 
- 
-# -------- READ (ALL) --------
 
+# -------- READ (ALL) --------
 def get_all_users():
+    conn = connect_db()
+    return conn.execute("SELECT * FROM users").fetchall()
 
+
+def iter_users(chunk_size=1000):
+    """
+    Yield every user in id order, chunk_size rows per query.
+    Each chunk is a separate keyset query (id > last seen), so memory stays
+    constant and no read transaction is held open between chunks.
+    """
     conn = connect_db()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT * FROM users WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunk_size)
+        ).fetchall()
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def get_users_page(page_token=None, limit=100):
+    """
+    One page of users in id order: returns (rows, next_page_token).
+    next_page_token is None on the last page. Raises ValueError for a bad token.
+    """
+    after_id = 0
+    if page_token:
+        if not str(page_token).isdigit():
+            raise ValueError("Invalid page token")
+        after_id = int(page_token)
+    limit = max(1, min(int(limit), 1000))
 
-    cursor = conn.cursor()
- 
-    cursor.execute("SELECT * FROM users")
+    conn = connect_db()
+    rows = conn.execute(
+        "SELECT * FROM users WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit + 1)
+    ).fetchall()
+    if len(rows) > limit:
+        return rows[:limit], str(rows[limit - 1][0])
+    return rows, None
 
-    users = cursor.fetchall()
- 
-    conn.close()
 
-    return users
- 
- 
 # -------- READ (ONE) --------
-
 def find_user_by_email(email):
+    hit, cached = _cache.lookup(email)
+    if hit:
+        return _apply_pending(email, cached)
+
+    conn = connect_db()
+    user = conn.execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
+    _cache.store(email, user, cached)
+    return _apply_pending(email, user)
+
+
+def find_users_by_email(emails):
+    """{email: row or None} for many emails: cache first, then one IN query for the rest."""
+    found = {}
+    missing = {}
+    for email in emails:
+        hit, cached = _cache.lookup(email)
+        if hit:
+            found[email] = cached
+        else:
+            missing[email] = cached
 
     conn = connect_db()
+    pending = list(missing)
+    for start in range(0, len(pending), MAX_SQL_PARAMS):
+        chunk = pending[start:start + MAX_SQL_PARAMS]
+        marks = ",".join("?" * len(chunk))
+        for row in conn.execute(f"SELECT * FROM users WHERE email IN ({marks})", chunk):
+            found[row[2]] = row
+    for email, generation in missing.items():
+        found.setdefault(email, None)
+        _cache.store(email, found[email], generation)
+    if _write_behind is not None:
+        return {email: _apply_pending(email, row) for email, row in found.items()}
+    return found
 
-    cursor = conn.cursor()
- 
-    cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
 
-    user = cursor.fetchone()
- 
-    conn.close()
+def search_users(text, limit=20):
+    """Ranked prefix search on name and email words (FTS5 index from user_search)."""
+    return _search_users(connect_db(), text, limit)
 
-    return user
- 
- 
-# -------- UPDATE --------
 
+# -------- UPDATE --------
 def update_user(email, new_name, new_age):
+    if _write_behind is not None:
+        _write_behind.enqueue_update(email, new_name, new_age)
+        print("✅ User update queued")
+        return
 
     conn = connect_db()
-
-    cursor = conn.cursor()
- 
-    cursor.execute(
-
-        "UPDATE users SET name = ?, age = ? WHERE email = ?",
-
+    # last writer wins, but the version still moves so CAS writers notice
+    cursor = _retry.run(conn, lambda c: c.execute(
+        "UPDATE users SET name = ?, age = ?, version = version + 1 WHERE email = ?",
         (new_name, new_age, email)
+    ))
+    _cache.invalidate(email)
 
-    )
- 
-    conn.commit()
- 
     if cursor.rowcount:
-
         print("✅ User updated successfully")
-
     else:
-
         print("❌ User not found")
- 
-    conn.close()
- 
- 
-# -------- DELETE --------
 
-def delete_user(email):
 
+def update_user_if_version(email, new_name, new_age, expected_version):
+    """
+    Compare-and-swap update: only applies if the row is still at
+    expected_version (row[4] from find_user_by_email). Returns True if it
+    was applied, False on a conflict (re-read and try again) or no such user.
+    """
+    if _write_behind is not None:
+        _write_behind.flush()  # CAS must see every queued write
     conn = connect_db()
+    cursor = _retry.run(conn, lambda c: c.execute(
+        "UPDATE users SET name = ?, age = ?, version = version + 1 "
+        "WHERE email = ? AND version = ?",
+        (new_name, new_age, email, expected_version)
+    ))
+    _cache.invalidate(email)
+    if cursor.rowcount:
+        _retry.stats.add(cas_updates=1)
+        return True
+    _retry.stats.add(cas_conflicts=1)
+    return False
 
-    cursor = conn.cursor()
- 
-    cursor.execute("DELETE FROM users WHERE email = ?", (email,))
 
-    conn.commit()
- 
-    if cursor.rowcount:
+# -------- DELETE --------
+def delete_user(email):
+    if _email_filter is not None:
+        _email_filter.discard(email)
+    if _write_behind is not None:
+        _write_behind.enqueue_delete(email)
+        print("✅ User delete queued")
+        return
 
-        print("✅ User deleted successfully")
+    conn = connect_db()
+    cursor = _retry.run(conn, lambda c: c.execute("DELETE FROM users WHERE email = ?", (email,)))
+    _cache.invalidate(email)
 
+    if cursor.rowcount:
+        print("✅ User deleted successfully")
     else:
-
         print("❌ User not found")
- 
-    conn.close()
-
- 
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""
+user_search.py
+
+FTS5 name/email search over the users table. users_fts is an external-content
+index (it stores only the index, reading text from users), kept in sync by
+triggers, so add_user / update_user / delete_user need no changes.
+
+  python user_search.py search "rash nad"
+  python user_search.py --db users.db rebuild
+"""
+
+import argparse
+import re
+import sqlite3
+import time
+
+
+SEARCH_SCHEMA = [
+    # prefix='2 3' keeps short prefix queries on their own small index
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        name, email,
+        content='users', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts (rowid, name, email) VALUES (new.id, new.name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+        INSERT INTO users_fts (users_fts, rowid, name, email)
+        VALUES ('delete', old.id, old.name, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF name, email ON users BEGIN
+        INSERT INTO users_fts (users_fts, rowid, name, email)
+        VALUES ('delete', old.id, old.name, old.email);
+        INSERT INTO users_fts (rowid, name, email) VALUES (new.id, new.name, new.email);
+    END
+    """,
+]
+
+# bm25 column weights: a name match ranks above an email match
+NAME_WEIGHT = 10.0
+EMAIL_WEIGHT = 1.0
+MAX_RESULTS = 100
+
+_WORDS = re.compile(r"\w+", re.UNICODE)
+
+
+def install_search(conn):
+    """
+    Create the index and triggers if missing; a new index on an existing
+    table is filled straight away. Returns False if SQLite lacks FTS5.
+    """
+    fresh = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users_fts'"
+    ).fetchone() is None
+    try:
+        with conn:
+            for statement in SEARCH_SCHEMA:
+                conn.execute(statement)
+    except sqlite3.OperationalError as error:
+        if "fts5" in str(error):
+            return False
+        raise
+    if fresh:
+        rebuild(conn)
+    return True
+
+
+def rebuild(conn):
+    """Re-index every user from the users table, then merge the index segments."""
+    with conn:
+        conn.execute("INSERT INTO users_fts (users_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO users_fts (users_fts) VALUES ('optimize')")
+
+
+def match_expression(text):
+    """'Rash nad' -> '"rash"* AND "nad"*' (every word as a prefix; FTS syntax can't leak in)."""
+    words = _WORDS.findall(text.lower())
+    return " AND ".join(f'"{word}"*' for word in words)
+
+
+def search_users(conn, text, limit=20):
+    """
+    Users whose name/email words start with every word in text, best match
+    first (ranked over all matches). limit is clamped to 1..MAX_RESULTS.
+    """
+    expression = match_expression(text)
+    if not expression:
+        return []
+    limit = max(1, min(int(limit), MAX_RESULTS))
+    # rank inside FTS5 so only the top `limit` rowids are joined back to users
+    return conn.execute(
+        f"""
+        SELECT users.* FROM (
+            SELECT rowid, bm25(users_fts, {NAME_WEIGHT}, {EMAIL_WEIGHT}) AS score
+            FROM users_fts WHERE users_fts MATCH ? ORDER BY score LIMIT ?
+        ) AS hits
+        JOIN users ON users.id = hits.rowid
+        ORDER BY hits.score
+        """,
+        (expression, limit),
+    ).fetchall()
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text user search.")
+    parser.add_argument("--db", default="users.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+    find = sub.add_parser("search", help="ranked prefix search on name and email")
+    find.add_argument("text")
+    find.add_argument("--limit", type=int, default=20)
+    sub.add_parser("rebuild", help="install (if needed) and rebuild the index")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if not install_search(conn):
+            print("❌ This SQLite build has no FTS5")
+            return
+        if args.command == "rebuild":
+            start = time.perf_counter()
+            rebuild(conn)
+            print(f"✅ Search index rebuilt in {time.perf_counter() - start:.2f}s")
+        else:
+            start = time.perf_counter()
+            rows = search_users(conn, args.text, args.limit)
+            elapsed = (time.perf_counter() - start) * 1000
+            for row in rows:
+                print(row)
+            print(f"{len(rows)} matches in {elapsed:.2f} ms")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
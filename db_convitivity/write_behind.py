@@ -0,0 +1,217 @@
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+
+from contention import is_busy
+
+
+logger = logging.getLogger(__name__)
+
+UPDATE = "update"
+DELETE = "delete"
+
+
+def coalesce(older, newer):
+    """Combine two queued ops for the same email into the one that has the same effect."""
+    if older[0] == DELETE and newer[0] == UPDATE:
+        return older  # updating a deleted row does nothing
+    return newer
+
+
+class WriteBehindQueue:
+    """
+    Buffers update/delete mutations per email and writes them in batched
+    transactions from one background thread.
+    - repeated changes to one email collapse into a single statement
+    - a batch is written when batch_size emails are pending or every
+      flush_interval seconds, whichever comes first
+    - flush() blocks until everything queued before the call is committed
+    - pending_op(email) exposes unwritten changes for read-your-writes
+    - a busy/locked batch is retried whole; any other error retries it row by
+      row and dead-letters the rows that still fail, so one bad change can't
+      hold up the rest of the queue
+    """
+
+    def __init__(self, connect, batch_size=500, flush_interval=0.05, max_dead_letters=1000):
+        self._connect = connect
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._cond = threading.Condition()
+        # email -> op tuple; ("update", name, age) or ("delete",)
+        self._pending = OrderedDict()
+        # batch currently being written (still visible to readers until committed)
+        self._inflight = {}
+        self._enqueued = 0
+        self._written = 0
+        self._flush_requested = False
+        self._stopping = False
+        self.batches = 0
+        self.coalesced = 0
+        self.statements = 0
+        self.failures = 0
+        self.dropped = 0
+        # (email, op, error) for the most recent rows that could not be written
+        self.dead_letters = deque(maxlen=max_dead_letters)
+        self._thread = threading.Thread(target=self._run, name="user-write-behind", daemon=True)
+        self._thread.start()
+
+    # -------- Producers --------
+    def _enqueue(self, email, op):
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Write-behind queue is closed.")
+            previous = self._pending.get(email)
+            if previous is not None:
+                op = coalesce(previous, op)
+                self.coalesced += 1
+            self._pending[email] = op
+            self._enqueued += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+
+    def enqueue_update(self, email, name, age):
+        self._enqueue(email, (UPDATE, name, age))
+
+    def enqueue_delete(self, email):
+        self._enqueue(email, (DELETE,))
+
+    def pending_op(self, email):
+        """Latest unwritten op for email, or None."""
+        with self._cond:
+            op = self._pending.get(email)
+            inflight = self._inflight.get(email)
+            if op is None:
+                return inflight
+            if inflight is None:
+                return op
+            return coalesce(inflight, op)
+
+    def __len__(self):
+        return len(self._pending) + len(self._inflight)
+
+    # -------- Durability --------
+    def flush(self, timeout=None):
+        """
+        Wait until everything queued so far is written. Returns False on timeout
+        or when changes were dead-lettered meanwhile (see dead_letters).
+        """
+        with self._cond:
+            target = self._enqueued
+            dropped = self.dropped
+            self._flush_requested = True
+            self._cond.notify_all()
+            done = self._cond.wait_for(lambda: self._written >= target, timeout=timeout)
+            return done and self.dropped == dropped
+
+    def close(self, timeout=None):
+        self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    # -------- Writer thread --------
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or self._flush_requested
+                    or len(self._pending) >= self.batch_size,
+                    timeout=self.flush_interval,
+                )
+                if self._stopping and not self._pending:
+                    return
+                self._flush_requested = False
+                if not self._pending:
+                    continue
+                batch = self._pending
+                self._pending = OrderedDict()
+                self._inflight = batch
+                target = self._enqueued
+
+            retry = self._write(batch)
+
+            with self._cond:
+                self._inflight = {}
+                if not retry:
+                    self._written = target
+                else:
+                    # put the rest back under anything queued meanwhile and retry next tick
+                    merged = OrderedDict(retry)
+                    for email, op in self._pending.items():
+                        merged[email] = coalesce(merged[email], op) if email in merged else op
+                    self._pending = merged
+                self._cond.notify_all()
+
+    def _write(self, batch):
+        """Write a batch; returns the changes to retry (empty when none are left)."""
+        updates = [(op[1], op[2], email) for email, op in batch.items() if op[0] == UPDATE]
+        deletes = [(email,) for email, op in batch.items() if op[0] == DELETE]
+        conn = self._connect()
+        try:
+            with conn:
+                if updates:
+                    conn.executemany(
+                        "UPDATE users SET name = ?, age = ?, version = version + 1 WHERE email = ?",
+                        updates,
+                    )
+                if deletes:
+                    conn.executemany("DELETE FROM users WHERE email = ?", deletes)
+        except Exception as error:
+            self.failures += 1
+            if isinstance(error, sqlite3.OperationalError) and is_busy(error):
+                logger.warning("Write-behind batch of %d changes hit a busy database; will retry",
+                               len(batch))
+                return batch
+            logger.exception("Write-behind batch of %d changes failed; retrying row by row",
+                             len(batch))
+            return self._write_rows(conn, batch)
+        self.batches += 1
+        self.statements += len(batch)
+        self.on_committed(list(batch))
+        return {}
+
+    def _write_rows(self, conn, batch):
+        # one transaction per change, so only the changes that really fail are lost
+        written, retry = [], OrderedDict()
+        for email, op in batch.items():
+            try:
+                with conn:
+                    if op[0] == UPDATE:
+                        conn.execute(
+                            "UPDATE users SET name = ?, age = ?, version = version + 1 WHERE email = ?",
+                            (op[1], op[2], email),
+                        )
+                    else:
+                        conn.execute("DELETE FROM users WHERE email = ?", (email,))
+            except Exception as error:
+                if isinstance(error, sqlite3.OperationalError) and is_busy(error):
+                    retry[email] = op
+                    continue
+                logger.error("Write-behind dropped %s for %s: %s", op[0], email, error)
+                with self._cond:
+                    self.dropped += 1
+                    self.dead_letters.append((email, op, repr(error)))
+                continue
+            written.append(email)
+        self.statements += len(written)
+        if written:
+            self.on_committed(written)
+        return retry
+
+    def on_committed(self, emails):
+        """Hook called after a batch commits (user_db uses it to invalidate its cache)."""
+
+    def stats(self):
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "inflight": len(self._inflight),
+                "enqueued": self._enqueued,
+                "coalesced": self.coalesced,
+                "batches": self.batches,
+                "statements": self.statements,
+                "failures": self.failures,
+                "dropped": self.dropped,
+            }
@@ -1,11 +1,17 @@
+from bisect import bisect_left, bisect_right, insort
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 
 # ----------------------------
 # Data Models
 # ----------------------------
 
+def to_paise(amount: float) -> int:
+    """Rupees (float) -> whole paise (int), so money math never drifts."""
+    return int(round(amount * 100))
+
+
 @dataclass(frozen=True)
 class Food:
     id: int
@@ -13,63 +19,212 @@ class Food:
     category: str
     price: float
 
+    @property
+    def price_paise(self) -> int:
+        return to_paise(self.price)
+
 
 @dataclass
 class CartItem:
     food: Food
     qty: int
 
+    @property
+    def line_total_paise(self) -> int:
+        return self.food.price_paise * self.qty
+
     @property
     def line_total(self) -> float:
-        return self.food.price * self.qty
+        return self.line_total_paise / 100
 
 
 class Cart:
+    """
+    Keeps a running total in integer paise and the food ids in sorted order,
+    so total_bill is O(1) and items come back in ID order without a sort.
+    Change quantities through Cart methods (not CartItem.qty directly),
+    otherwise the running total gets out of sync.
+    """
+
     def __init__(self) -> None:
         # key = food_id, value = CartItem
         self._items: Dict[int, CartItem] = {}
+        # food ids in ascending order (kept with bisect)
+        self._ids: List[int] = []
+        self._total_paise = 0
 
     def add(self, food: Food, qty: int = 1) -> None:
         if qty <= 0:
             raise ValueError("Quantity must be greater than 0.")
-        if food.id in self._items:
-            self._items[food.id].qty += qty
-        else:
+        item = self._items.get(food.id)
+        if item is None:
             self._items[food.id] = CartItem(food=food, qty=qty)
+            insort(self._ids, food.id)
+            self._total_paise += food.price_paise * qty
+        else:
+            # the whole line takes the food as added last (a price may have changed),
+            # so total_paise always equals the sum of the line totals
+            self._total_paise -= item.line_total_paise
+            item.food = food
+            item.qty += qty
+            self._total_paise += item.line_total_paise
 
     def update_qty(self, food_id: int, qty: int) -> None:
         if food_id not in self._items:
             raise KeyError("Item not found in cart.")
         if qty <= 0:
             # remove if qty is 0 or negative
-            del self._items[food_id]
+            self._drop(food_id)
         else:
-            self._items[food_id].qty = qty
+            item = self._items[food_id]
+            self._total_paise += item.food.price_paise * (qty - item.qty)
+            item.qty = qty
 
     def remove(self, food_id: int) -> None:
         if food_id in self._items:
-            del self._items[food_id]
+            self._drop(food_id)
+
+    def _drop(self, food_id: int) -> None:
+        item = self._items.pop(food_id)
+        self._total_paise -= item.line_total_paise
+        del self._ids[bisect_left(self._ids, food_id)]
 
     def clear(self) -> None:
         self._items.clear()
+        self._ids.clear()
+        self._total_paise = 0
 
     @property
     def items(self) -> List[CartItem]:
-        return list(self._items.values())
+        """Cart items in food ID order."""
+        return [self._items[food_id] for food_id in self._ids]
+
+    @property
+    def total_paise(self) -> int:
+        return self._total_paise
 
     @property
     def total_bill(self) -> float:
-        return sum(item.line_total for item in self._items.values())
+        return self._total_paise / 100
 
     def is_empty(self) -> bool:
         return len(self._items) == 0
 
 
+# ----------------------------
+# Catalog Index
+# ----------------------------
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MenuIndex:
+    """
+    Read-only search structures over a list of foods, built once up front:
+    - category -> foods (ID order)
+    - price-sorted arrays for range queries (bisect)
+    - sorted word list for prefix search (a flattened trie)
+    - trigram -> food ids for fuzzy / typo-tolerant search
+    """
+
+    def __init__(self, foods: List[Food]) -> None:
+        self.sorted_foods: List[Food] = sorted(foods, key=lambda f: f.id)
+        self._by_id: Dict[int, Food] = {f.id: f for f in self.sorted_foods}
+
+        self._by_category: Dict[str, List[Food]] = {}
+        for f in self.sorted_foods:
+            self._by_category.setdefault(f.category.lower(), []).append(f)
+
+        by_price = sorted(self.sorted_foods, key=lambda f: (f.price_paise, f.id))
+        self._prices: List[int] = [f.price_paise for f in by_price]
+        self._foods_by_price: List[Food] = by_price
+
+        # (word, food_id) pairs; every word of every name is searchable by prefix
+        words: Set[Tuple[str, int]] = set()
+        self._trigram_ids: Dict[str, Set[int]] = {}
+        self._trigram_counts: Dict[int, int] = {}
+        for f in self.sorted_foods:
+            name = f.name.lower()
+            for word in name.split():
+                words.add((word, f.id))
+            grams = _trigrams(name)
+            self._trigram_counts[f.id] = len(grams)
+            for gram in grams:
+                self._trigram_ids.setdefault(gram, set()).add(f.id)
+        self._words: List[Tuple[str, int]] = sorted(words)
+
+    @property
+    def categories(self) -> List[str]:
+        return sorted({foods[0].category for foods in self._by_category.values()})
+
+    def by_category(self, category: str) -> List[Food]:
+        return list(self._by_category.get(category.lower(), []))
+
+    def by_price_range(self, min_price: float = 0.0, max_price: Optional[float] = None) -> List[Food]:
+        """Foods with min_price <= price <= max_price, cheapest first."""
+        lo = bisect_left(self._prices, to_paise(min_price))
+        if max_price is None:
+            hi = len(self._prices)
+        else:
+            hi = bisect_right(self._prices, to_paise(max_price))
+        return self._foods_by_price[lo:hi]
+
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        ids: Set[int] = set()
+        i = bisect_left(self._words, (prefix,))
+        while i < len(self._words) and self._words[i][0].startswith(prefix):
+            ids.add(self._words[i][1])
+            i += 1
+        return ids
+
+    def prefix_search(self, text: str) -> List[Food]:
+        """Every query word must be the start of some word in the name."""
+        terms = text.lower().split()
+        if not terms:
+            return []
+        ids = self._prefix_ids(terms[0])
+        for term in terms[1:]:
+            if not ids:
+                break
+            ids &= self._prefix_ids(term)
+        return [self._by_id[food_id] for food_id in sorted(ids)]
+
+    def fuzzy_search(self, text: str, limit: int = 10, min_score: float = 0.3) -> List[Food]:
+        """Rank foods by trigram overlap (Dice coefficient) with the query."""
+        grams = _trigrams(text.lower().strip())
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for food_id in self._trigram_ids.get(gram, ()):
+                shared[food_id] = shared.get(food_id, 0) + 1
+        scored = []
+        for food_id, count in shared.items():
+            score = 2 * count / (len(grams) + self._trigram_counts[food_id])
+            if score >= min_score:
+                scored.append((-score, food_id))
+        scored.sort()
+        return [self._by_id[food_id] for _, food_id in scored[:limit]]
+
+    def search(self, text: str, limit: int = 10, fuzzy: bool = True) -> List[Food]:
+        """Prefix matches first (ID order), then fuzzy matches to fill up to limit."""
+        results = self.prefix_search(text)[:limit]
+        if fuzzy and len(results) < limit:
+            seen = {f.id for f in results}
+            for f in self.fuzzy_search(text, limit=limit):
+                if f.id not in seen:
+                    results.append(f)
+                    if len(results) == limit:
+                        break
+        return results
+
+
 class Menu:
     def __init__(self, outlet_name: str, outlet_id: str, foods: List[Food]) -> None:
         self.outlet_name = outlet_name
         self.outlet_id = outlet_id
         self._foods_by_id: Dict[int, Food] = {f.id: f for f in foods}
+        self.index = MenuIndex(list(self._foods_by_id.values()))
 
     @property
     def foods(self) -> List[Food]:
@@ -78,13 +233,22 @@ class Menu:
     def get_food(self, food_id: int) -> Optional[Food]:
         return self._foods_by_id.get(food_id)
 
+    def foods_in_category(self, category: str) -> List[Food]:
+        return self.index.by_category(category)
+
+    def foods_in_price_range(self, min_price: float = 0.0, max_price: Optional[float] = None) -> List[Food]:
+        return self.index.by_price_range(min_price, max_price)
+
+    def search(self, text: str, limit: int = 10, fuzzy: bool = True) -> List[Food]:
+        return self.index.search(text, limit=limit, fuzzy=fuzzy)
+
     def print_menu(self) -> None:
         print("\n" + "=" * 60)
         print(f"Pizza Hut Menu | Outlet: {self.outlet_name} (ID: {self.outlet_id})")
         print("=" * 60)
         print(f"{'ID':<5} {'Item':<28} {'Category':<15} {'Price (₹)':>10}")
         print("-" * 60)
-        for f in sorted(self.foods, key=lambda x: x.id):
+        for f in self.index.sorted_foods:
             print(f"{f.id:<5} {f.name:<28} {f.category:<15} {f.price:>10.2f}")
         print("=" * 60)
 
@@ -135,7 +299,7 @@ def print_cart(cart: Cart) -> None:
 
     print(f"{'ID':<5} {'Item':<28} {'Qty':>5} {'Price (₹)':>10} {'Total (₹)':>10}")
     print("-" * 60)
-    for item in sorted(cart.items, key=lambda x: x.food.id):
+    for item in cart.items:
         print(
             f"{item.food.id:<5} "
             f"{item.food.name:<28} "
@@ -148,35 +312,41 @@ def print_cart(cart: Cart) -> None:
     print("=" * 60)
 
 
-def print_invoice(menu: Menu, cart: Cart) -> None:
-    print("\n" + "#" * 60)
-    print("ORDER CONFIRMATION / INVOICE")
-    print("#" * 60)
-    print(f"Outlet: {menu.outlet_name} (ID: {menu.outlet_id})")
-    print("-" * 60)
-
-    print(f"{'Item':<30} {'Qty':>5} {'Unit (₹)':>10} {'Line (₹)':>12}")
-    print("-" * 60)
-    for item in sorted(cart.items, key=lambda x: x.food.id):
-        print(
+def format_invoice(menu: Menu, cart: Cart) -> str:
+    lines = [
+        "\n" + "#" * 60,
+        "ORDER CONFIRMATION / INVOICE",
+        "#" * 60,
+        f"Outlet: {menu.outlet_name} (ID: {menu.outlet_id})",
+        "-" * 60,
+        f"{'Item':<30} {'Qty':>5} {'Unit (₹)':>10} {'Line (₹)':>12}",
+        "-" * 60,
+    ]
+    for item in cart.items:
+        lines.append(
             f"{item.food.name:<30} "
             f"{item.qty:>5} "
             f"{item.food.price:>10.2f} "
             f"{item.line_total:>12.2f}"
         )
-    print("-" * 60)
-    print(f"{'TOTAL AMOUNT (₹)':>47} {cart.total_bill:>12.2f}")
-    print("#" * 60)
-    print("Thank you for ordering from Pizza Hut.\n")
+    lines.append("-" * 60)
+    lines.append(f"{'TOTAL AMOUNT (₹)':>47} {cart.total_bill:>12.2f}")
+    lines.append("#" * 60)
+    lines.append("Thank you for ordering from Pizza Hut.\n")
+    return "\n".join(lines)
+
+
+def print_invoice(menu: Menu, cart: Cart) -> None:
+    print(format_invoice(menu, cart))
 
 
 # ----------------------------
 # Main Application
 # ----------------------------
 
-def run_app() -> None:
+def build_default_menu() -> Menu:
     # You can customize these items as needed
-    menu = Menu(
+    return Menu(
         outlet_name="Pizza Hut - MG Road",
         outlet_id="PH-MG-001",
         foods=[
@@ -191,6 +361,10 @@ def run_app() -> None:
         ],
     )
 
+
+def run_app(on_order_placed: Optional[Callable[[Menu, Cart], None]] = None) -> None:
+    menu = build_default_menu()
+
     cart = Cart()
 
     while True:
@@ -257,6 +431,9 @@ def run_app() -> None:
             print_cart(cart)
             if read_yes_no("Confirm place order? (Y/N): "):
                 print_invoice(menu, cart)
+                if on_order_placed is not None:
+                    # e.g. lambda m, c: journal.record_order(m, c).result()
+                    on_order_placed(menu, cart)
                 cart.clear()
             else:
                 print("Order cancelled. You can continue shopping.")
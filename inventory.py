@@ -0,0 +1,348 @@
+"""
+inventory.py
+
+Per-outlet stock tracking with reserve / commit / release.
+- add to cart      -> reserve(cart_id, food_id, qty)   stock is held
+- order placed     -> commit(cart_id)                 held stock is consumed
+- cart expired     -> release(cart_id)                held stock goes back
+
+Contention handling:
+- lock striping: carts and restocks hash onto fixed sets of stripe locks
+  instead of one global lock, so unrelated carts/items never wait on each other
+- sharded counters: each item's stock is split across several shards with
+  their own locks; a reservation tries its "home" shard first and only walks
+  the other shards when that one runs dry, so a hot item ("Margherita") does
+  not funnel every checkout through a single lock
+Stock can never go negative: every decrement happens under the shard lock
+after checking the shard has enough.
+"""
+
+import argparse
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+class InventoryError(Exception):
+    """Base exception for inventory errors."""
+
+
+class OutOfStockError(InventoryError):
+    """Raised when a reservation cannot be satisfied."""
+
+
+# Each thread gets its own home-shard slot the first time it reserves.
+# (threading.get_ident() is an aligned address on glibc, so ident % shards
+# put every thread on shard 0.)
+_thread_slots = itertools.count()
+_thread_home = threading.local()
+
+
+def _home_slot() -> int:
+    slot = getattr(_thread_home, "slot", None)
+    if slot is None:
+        slot = _thread_home.slot = next(_thread_slots)
+    return slot
+
+
+class _Shard:
+    __slots__ = ("lock", "available", "sold")
+
+    def __init__(self, available: int) -> None:
+        self.lock = threading.Lock()
+        self.available = available
+        self.sold = 0
+
+
+class _Counter:
+    """Stock of one item split over several independently locked shards."""
+
+    __slots__ = ("shards",)
+
+    def __init__(self, quantity: int, shard_count: int) -> None:
+        base, extra = divmod(quantity, shard_count)
+        self.shards = [_Shard(base + (1 if i < extra else 0)) for i in range(shard_count)]
+
+    @property
+    def available(self) -> int:
+        return sum(shard.available for shard in self.shards)
+
+    @property
+    def sold(self) -> int:
+        return sum(shard.sold for shard in self.shards)
+
+    def take(self, qty: int, home: int) -> Optional[List[Tuple[int, int]]]:
+        """Take qty units, home shard first. Returns [(shard, taken)] or None (nothing taken)."""
+        taken: List[Tuple[int, int]] = []
+        needed = qty
+        count = len(self.shards)
+        for step in range(count):
+            index = (home + step) % count
+            shard = self.shards[index]
+            if not shard.available:
+                continue  # unlocked peek; the real check happens under the lock
+            with shard.lock:
+                got = min(shard.available, needed)
+                shard.available -= got
+            if got:
+                taken.append((index, got))
+                needed -= got
+                if needed == 0:
+                    return taken
+        self.give_back(taken)
+        return None
+
+    def restock(self, quantity: int) -> int:
+        """Spread quantity over the existing shards, all shard locks held. Returns units added."""
+        base, extra = divmod(quantity, len(self.shards))
+        for shard in self.shards:  # always in index order; take() holds one lock at a time
+            shard.lock.acquire()
+        try:
+            before = sum(shard.available for shard in self.shards)
+            for i, shard in enumerate(self.shards):
+                shard.available = base + (1 if i < extra else 0)
+        finally:
+            for shard in self.shards:
+                shard.lock.release()
+        return quantity - before
+
+    def give_back(self, taken: List[Tuple[int, int]]) -> None:
+        for index, qty in taken:
+            shard = self.shards[index]
+            with shard.lock:
+                shard.available += qty
+
+    def mark_sold(self, taken: List[Tuple[int, int]]) -> None:
+        # sales are counted per shard too, so commits of a hot item don't share a lock
+        for index, qty in taken:
+            shard = self.shards[index]
+            with shard.lock:
+                shard.sold += qty
+
+
+@dataclass
+class _Reservation:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # food_id -> [(shard, qty)]
+    held: Dict[int, List[Tuple[int, int]]] = field(default_factory=dict)
+
+
+class OutletInventory:
+    def __init__(self, outlet_id: str, stripes: int = 64, shards_per_item: int = 8) -> None:
+        self.outlet_id = outlet_id
+        self.shards_per_item = shards_per_item
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        # food_id -> _Counter; created once under the food's stripe lock, never replaced
+        self._counters: Dict[int, _Counter] = {}
+        # cart_id -> _Reservation; guarded by the cart's stripe lock
+        self._carts: Dict[str, _Reservation] = {}
+        self._cart_stripes = [threading.Lock() for _ in range(stripes)]
+
+    def _stripe(self, food_id: int) -> threading.Lock:
+        return self._stripes[hash(food_id) % len(self._stripes)]
+
+    def _reservation(self, cart_id: str, create: bool) -> Optional[_Reservation]:
+        lock = self._cart_stripes[hash(cart_id) % len(self._cart_stripes)]
+        with lock:
+            reservation = self._carts.get(cart_id)
+            if reservation is None and create:
+                reservation = self._carts[cart_id] = _Reservation()
+            return reservation
+
+    def _pop_reservation(self, cart_id: str) -> Optional[_Reservation]:
+        lock = self._cart_stripes[hash(cart_id) % len(self._cart_stripes)]
+        with lock:
+            return self._carts.pop(cart_id, None)
+
+    # ---- stock levels ----
+
+    def set_stock(self, food_id: int, quantity: int) -> int:
+        """
+        (Re)stock an item. Units already reserved by carts are unaffected.
+        Returns how many units were added (negative when stock was cut).
+        """
+        if quantity < 0:
+            raise ValueError("Quantity cannot be negative.")
+        with self._stripe(food_id):
+            counter = self._counters.get(food_id)
+            if counter is None:
+                self._counters[food_id] = _Counter(quantity, self.shards_per_item)
+                return quantity
+        # restock in place: reserve/commit/release in flight keep working on the same shards
+        return counter.restock(quantity)
+
+    def available(self, food_id: int) -> int:
+        counter = self._counters.get(food_id)
+        return counter.available if counter else 0
+
+    def sold(self, food_id: int) -> int:
+        counter = self._counters.get(food_id)
+        return counter.sold if counter else 0
+
+    # ---- cart lifecycle ----
+
+    def reserve(self, cart_id: str, food_id: int, qty: int) -> None:
+        """Hold qty units for a cart. Raises OutOfStockError if not enough are left."""
+        if qty <= 0:
+            raise ValueError("Quantity must be greater than 0.")
+        counter = self._counters.get(food_id)
+        if counter is None:
+            raise OutOfStockError(f"Food ID {food_id} is not stocked at {self.outlet_id}.")
+        home = _home_slot() % len(counter.shards)
+        taken = counter.take(qty, home)
+        if taken is None:
+            raise OutOfStockError(f"Only {counter.available} left of food ID {food_id}.")
+        reservation = self._reservation(cart_id, create=True)
+        with reservation.lock:
+            reservation.held.setdefault(food_id, []).extend(taken)
+
+    def unreserve(self, cart_id: str, food_id: int) -> int:
+        """Give back everything a cart holds of one item (item removed from cart)."""
+        reservation = self._reservation(cart_id, create=False)
+        if reservation is None:
+            return 0
+        with reservation.lock:
+            taken = reservation.held.pop(food_id, [])
+        counter = self._counters.get(food_id)
+        if counter is not None:
+            counter.give_back(taken)
+        return sum(qty for _, qty in taken)
+
+    def commit(self, cart_id: str) -> Dict[int, int]:
+        """Order placed: held units become sold. Returns food_id -> qty."""
+        reservation = self._pop_reservation(cart_id)
+        if reservation is None:
+            return {}
+        sold: Dict[int, int] = {}
+        with reservation.lock:
+            for food_id, taken in reservation.held.items():
+                sold[food_id] = sum(q for _, q in taken)
+                counter = self._counters.get(food_id)
+                if counter is not None:
+                    counter.mark_sold(taken)
+        return sold
+
+    def release(self, cart_id: str) -> int:
+        """Cart abandoned / expired: all held units go back on the shelf."""
+        reservation = self._pop_reservation(cart_id)
+        if reservation is None:
+            return 0
+        released = 0
+        with reservation.lock:
+            for food_id, taken in reservation.held.items():
+                counter = self._counters.get(food_id)
+                if counter is not None:
+                    counter.give_back(taken)
+                released += sum(q for _, q in taken)
+        return released
+
+
+class InventoryRegistry:
+    """One OutletInventory per outlet id."""
+
+    def __init__(self, stripes: int = 64, shards_per_item: int = 8) -> None:
+        self._stripes = stripes
+        self._shards_per_item = shards_per_item
+        self._outlets: Dict[str, OutletInventory] = {}
+        self._lock = threading.Lock()
+
+    def outlet(self, outlet_id: str) -> OutletInventory:
+        inventory = self._outlets.get(outlet_id)
+        if inventory is None:
+            with self._lock:
+                inventory = self._outlets.get(outlet_id)
+                if inventory is None:
+                    inventory = OutletInventory(outlet_id, self._stripes, self._shards_per_item)
+                    self._outlets[outlet_id] = inventory
+        return inventory
+
+
+# ----------------------------
+# Stress Benchmark
+# ----------------------------
+
+def stress(
+    threads: int, stock: int, attempts: int, shards: int, restocks: int = 0
+) -> Tuple[float, int, int]:
+    """
+    Every thread hammers the same hot item while another thread restocks it
+    `restocks` times. Returns (seconds, sold, failed).
+    """
+    inventory = OutletInventory("PH-MG-001", shards_per_item=shards)
+    added = [inventory.set_stock(1, stock)]
+    failures = [0] * threads
+    done = threading.Event()
+
+    def worker(n: int) -> None:
+        for i in range(attempts):
+            cart_id = f"{n}-{i}"
+            try:
+                inventory.reserve(cart_id, 1, 1)
+            except OutOfStockError:
+                failures[n] += 1
+                continue
+            if i % 4 == 0:
+                inventory.release(cart_id)  # abandoned cart
+            else:
+                inventory.commit(cart_id)
+
+    def restocker() -> None:
+        for _ in range(restocks):
+            if done.wait(0.001):
+                return
+            added.append(inventory.set_stock(1, stock // 10))
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    supplier = threading.Thread(target=restocker)
+    start = time.perf_counter()
+    supplier.start()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    supplier.join()
+
+    sold = inventory.sold(1)
+    left = inventory.available(1)
+    supplied = sum(added)
+    if sold + left != supplied or left < 0:
+        raise AssertionError(f"Oversold: sold={sold} left={left} supplied={supplied}")
+    used = sum(1 for shard in inventory._counters[1].shards if shard.sold)
+    if threads > 1 and shards > 1 and used < 2:
+        raise AssertionError(f"All {threads} threads sold from one shard; striping is not working")
+    return elapsed, sold, sum(failures)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Inventory reservation stress test.")
+    parser.add_argument("--attempts", type=int, default=20_000, help="reservations per thread")
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--restocks", type=int, default=20, help="restocks while the test runs")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print(f"Hot-item stress test ({args.attempts} reservations per thread)")
+    print("=" * 60)
+    print(f"{'Threads':>7} {'Shards':>7} {'Seconds':>9} {'Ops/sec':>11} {'Sold':>10} {'Rejected':>10}")
+    print("-" * 60)
+    for threads in args.threads:
+        # stock runs out part way through, so both paths are exercised
+        stock = threads * args.attempts // 2
+        for shards in sorted({1, args.shards}):
+            elapsed, sold, failed = stress(threads, stock, args.attempts, shards, args.restocks)
+            ops = threads * args.attempts / elapsed
+            print(f"{threads:>7} {shards:>7} {elapsed:>9.3f} {ops:>11.0f} {sold:>10} {failed:>10}")
+    print("-" * 60)
+    print("No oversells: sold + remaining == stock supplied (incl. restocks) in every run.")
+    print("Shards=1 is the single-lock baseline. With the GIL, pure-Python ops/sec stays")
+    print("roughly flat either way; shards remove the shared lock for free-threaded builds.")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+invoice_batch.py
+
+Bulk invoice rendering for end-of-day runs.
+Orders are flattened to plain tuples, rendered with precompiled row formats
+into one string per chunk, and written with large buffered writes - either
+one file per order or a single concatenated file. Chunks can be rendered on
+a process pool (worth it for per-order files, where file creation dominates;
+for a single file the pickling usually costs more than it saves).
+Output is byte-for-byte what print_invoice() prints.
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from foodapp import Cart, Menu, build_default_menu, format_invoice, print_invoice
+
+# (outlet_name, outlet_id, [(item_name, qty, unit_paise, line_paise), ...], total_paise)
+InvoiceData = Tuple[str, str, List[Tuple[str, int, int, int]], int]
+
+WRITE_BUFFER = 1 << 20
+
+# ----------------------------
+# Precompiled Formats
+# ----------------------------
+
+_RULE_HASH = "#" * 60
+_RULE_DASH = "-" * 60
+_TITLE = f"\n{_RULE_HASH}\nORDER CONFIRMATION / INVOICE\n{_RULE_HASH}\n"
+_OUTLET = "Outlet: {} (ID: {})\n".format
+_COLUMNS = f"{_RULE_DASH}\n{'Item':<30} {'Qty':>5} {'Unit (₹)':>10} {'Line (₹)':>12}\n{_RULE_DASH}\n"
+_ROW = "{:<30} {:>5} {:>10.2f} {:>12.2f}\n".format
+_TOTAL = ("{}\n{:>47} {:>12.2f}\n{}\nThank you for ordering from Pizza Hut.\n\n").format
+_TOTAL_LABEL = "TOTAL AMOUNT (₹)"
+
+
+def invoice_data(menu: Menu, cart: Cart) -> InvoiceData:
+    """Flatten one order to picklable tuples (cheap to ship to a worker)."""
+    lines = [
+        (item.food.name, item.qty, item.food.price_paise, item.line_total_paise)
+        for item in cart.items
+    ]
+    return menu.outlet_name, menu.outlet_id, lines, cart.total_paise
+
+
+def render_invoice(data: InvoiceData, row_cache: Optional[Dict[tuple, str]] = None) -> str:
+    """
+    Render one invoice. Item rows repeat a lot across a day's orders
+    (same item, same qty), so formatted rows are memoized in row_cache.
+    """
+    outlet_name, outlet_id, lines, total_paise = data
+    if row_cache is None:
+        row_cache = {}
+    parts = [_TITLE, _OUTLET(outlet_name, outlet_id), _COLUMNS]
+    for line in lines:
+        text = row_cache.get(line)
+        if text is None:
+            name, qty, unit_paise, line_paise = line
+            text = row_cache[line] = _ROW(name, qty, unit_paise / 100, line_paise / 100)
+        parts.append(text)
+    parts.append(_TOTAL(_RULE_DASH, _TOTAL_LABEL, total_paise / 100, _RULE_HASH))
+    return "".join(parts)
+
+
+def render_chunk(chunk: Sequence[InvoiceData]) -> str:
+    row_cache: Dict[tuple, str] = {}
+    return "".join([render_invoice(data, row_cache) for data in chunk])
+
+
+def _write_chunk_files(job: Tuple[str, int, Sequence[InvoiceData]]) -> int:
+    out_dir, first_number, chunk = job
+    row_cache: Dict[tuple, str] = {}
+    for offset, data in enumerate(chunk):
+        path = os.path.join(out_dir, invoice_filename(first_number + offset, data[1]))
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(render_invoice(data, row_cache))
+    return len(chunk)
+
+
+def invoice_filename(number: int, outlet_id: str) -> str:
+    return f"invoice-{number:07d}-{outlet_id}.txt"
+
+
+def _chunks(items: Iterable[InvoiceData], size: int) -> Iterator[List[InvoiceData]]:
+    chunk: List[InvoiceData] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ----------------------------
+# Batch Writers
+# ----------------------------
+
+def write_invoices_concatenated(
+    orders: Iterable[InvoiceData],
+    path: str,
+    workers: int = 0,
+    chunk_size: int = 1000,
+) -> int:
+    """Render all invoices into a single file. Returns the number written."""
+    count = 0
+    with open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER) as file:
+        chunks = _chunks(orders, chunk_size)
+        if workers > 0:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # results come back in chunk order, so the file matches the input order
+                for chunk, text in _map_bounded(pool, render_chunk, chunks, workers * 2):
+                    file.write(text)
+                    count += len(chunk)
+        else:
+            for chunk in chunks:
+                file.write(render_chunk(chunk))
+                count += len(chunk)
+    return count
+
+
+def _map_bounded(pool: ProcessPoolExecutor, func: Callable, items: Iterable, window: int) -> Iterator:
+    """
+    Yield (item, func(item)) in input order with at most `window` items
+    submitted at once, so input is consumed as results are written instead
+    of being read up front (pool.map would submit everything immediately).
+    """
+    pending: Deque = deque()
+    for item in items:
+        pending.append((item, pool.submit(func, item)))
+        if len(pending) >= window:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
+def write_invoices_per_order(
+    orders: Iterable[InvoiceData],
+    out_dir: str,
+    workers: int = 0,
+    chunk_size: int = 1000,
+) -> int:
+    """Write invoice-<n>-<outlet>.txt per order into out_dir. Returns the number written."""
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = _numbered_jobs(out_dir, _chunks(orders, chunk_size))
+    if workers > 0:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return sum(written for _, written in _map_bounded(pool, _write_chunk_files, jobs, workers * 2))
+    return sum(map(_write_chunk_files, jobs))
+
+
+def _numbered_jobs(out_dir: str, chunks: Iterator[List[InvoiceData]]) -> Iterator[Tuple[str, int, List[InvoiceData]]]:
+    number = 0
+    for chunk in chunks:
+        yield out_dir, number, chunk
+        number += len(chunk)
+
+
+# ----------------------------
+# Benchmark
+# ----------------------------
+
+def sample_orders(count: int, seed: int = 7) -> List[Tuple[Menu, Cart]]:
+    rng = random.Random(seed)
+    menu = build_default_menu()
+    foods = menu.foods
+    orders = []
+    for _ in range(count):
+        cart = Cart()
+        for food in rng.sample(foods, k=rng.randint(1, 6)):
+            cart.add(food, rng.randint(1, 4))
+        orders.append((menu, cart))
+    return orders
+
+
+def _print_invoice_per_line(menu: Menu, cart: Cart) -> None:
+    # The original print_invoice(): one print() call per invoice line.
+    for line in format_invoice(menu, cart).split("\n"):
+        print(line)
+
+
+def _time_print(path: str, orders: List[Tuple[Menu, Cart]], printer) -> float:
+    start = time.perf_counter()
+    with open(path, "w", encoding="utf-8") as file, contextlib.redirect_stdout(file):
+        for menu, cart in orders:
+            printer(menu, cart)
+    return time.perf_counter() - start
+
+
+def benchmark(count: int, out_dir: str, workers: int) -> None:
+    orders = sample_orders(count)
+    os.makedirs(out_dir, exist_ok=True)
+
+    baseline_path = os.path.join(out_dir, "baseline.txt")
+    baseline_sec = _time_print(baseline_path, orders, _print_invoice_per_line)
+    results = [
+        ("print() per line", baseline_sec),
+        ("print_invoice", _time_print(os.path.join(out_dir, "print_invoice.txt"), orders, print_invoice)),
+    ]
+
+    batch_path = os.path.join(out_dir, "batch.txt")
+    start = time.perf_counter()
+    write_invoices_concatenated((invoice_data(m, c) for m, c in orders), batch_path)
+    results.append(("batch, single file", time.perf_counter() - start))
+
+    if workers > 0:
+        pool_path = os.path.join(out_dir, "batch_pool.txt")
+        start = time.perf_counter()
+        write_invoices_concatenated(
+            (invoice_data(m, c) for m, c in orders), pool_path, workers=workers
+        )
+        results.append((f"batch, {workers} processes", time.perf_counter() - start))
+
+    with open(baseline_path, encoding="utf-8") as a, open(batch_path, encoding="utf-8") as b:
+        identical = a.read() == b.read()
+
+    print("=" * 60)
+    print(f"Rendering {count} invoices")
+    print("=" * 60)
+    print(f"{'Method':<30} {'Seconds':>12} {'Speedup':>12}")
+    print("-" * 60)
+    for name, seconds in results:
+        print(f"{name:<30} {seconds:>12.3f} {baseline_sec / seconds:>11.1f}x")
+    print("-" * 60)
+    print(f"Output identical to print_invoice: {'yes' if identical else 'NO'}")
+    print("=" * 60)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark bulk invoice rendering.")
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--out-dir", default="invoice_bench")
+    parser.add_argument("--workers", type=int, default=0)
+    args = parser.parse_args(argv)
+    benchmark(args.orders, args.out_dir, args.workers)
+
+
+if __name__ == "__main__":
+    main()
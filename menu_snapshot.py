@@ -0,0 +1,277 @@
+"""
+menu_snapshot.py
+
+Compact binary snapshot of a Menu, opened with mmap and decoded lazily.
+Opening a snapshot only reads the fixed header, so worker cold start does
+not grow with catalog size; Foods are decoded on first access.
+
+Layout (little-endian, every section 8-byte aligned):
+  header   magic "FMS1", version, food/string counts, outlet name/id string
+           codes, and the offset of each section below
+  ids      int64[food_count]   sorted ascending (binary-searchable in place)
+  names    uint32[food_count]  string code
+  cats     uint32[food_count]  string code
+  prices   int64[food_count]   paise
+  offsets  uint64[string_count + 1]  byte offsets into blob
+  blob     UTF-8 strings, each distinct string stored once
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+from foodapp import Food, Menu, MenuIndex, build_default_menu
+
+MAGIC = b"FMS1"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHIIII6Q")
+
+
+class SnapshotError(ValueError):
+    """Raised when a file is not a valid menu snapshot."""
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+# ----------------------------
+# Writer
+# ----------------------------
+
+def write_snapshot(menu: Menu, path: str) -> int:
+    """Write menu to path atomically (temp file + rename). Returns bytes written."""
+    foods = sorted(menu.foods, key=lambda f: f.id)
+    codes: Dict[str, int] = {}
+    strings: List[str] = []
+
+    def code(text: str) -> int:
+        if text not in codes:
+            codes[text] = len(strings)
+            strings.append(text)
+        return codes[text]
+
+    outlet_name_code = code(menu.outlet_name)
+    outlet_id_code = code(menu.outlet_id)
+    name_codes = [code(f.name) for f in foods]
+    category_codes = [code(f.category) for f in foods]
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for raw in encoded:
+        offsets.append(offsets[-1] + len(raw))
+
+    n = len(foods)
+    ids_off = _align(_HEADER.size)
+    names_off = _align(ids_off + 8 * n)
+    cats_off = _align(names_off + 4 * n)
+    prices_off = _align(cats_off + 4 * n)
+    offsets_off = _align(prices_off + 8 * n)
+    blob_off = _align(offsets_off + 8 * len(offsets))
+
+    buf = bytearray(blob_off + offsets[-1])
+    _HEADER.pack_into(
+        buf, 0, MAGIC, VERSION, 0, n, len(strings), outlet_name_code, outlet_id_code,
+        ids_off, names_off, cats_off, prices_off, offsets_off, blob_off,
+    )
+    struct.pack_into(f"<{n}q", buf, ids_off, *(f.id for f in foods))
+    struct.pack_into(f"<{n}I", buf, names_off, *name_codes)
+    struct.pack_into(f"<{n}I", buf, cats_off, *category_codes)
+    struct.pack_into(f"<{n}q", buf, prices_off, *(f.price_paise for f in foods))
+    struct.pack_into(f"<{len(offsets)}Q", buf, offsets_off, *offsets)
+    buf[blob_off:] = b"".join(encoded)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as file:
+        file.write(buf)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp, path)
+    return len(buf)
+
+
+# ----------------------------
+# Reader
+# ----------------------------
+
+class SnapshotMenu(Menu):
+    """
+    Read-only Menu over a mapped snapshot file.
+    Lookups binary-search the id column in place; decoded Foods and strings
+    are cached, and the search index is only built if someone searches.
+    """
+
+    def __init__(self, path: str) -> None:
+        # Menu.__init__ is skipped on purpose: nothing is decoded up front.
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise SnapshotError(f"{path}: empty file")
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise SnapshotError(f"{path}: too small to be a menu snapshot")
+
+        (magic, version, _, n, string_count, name_code, id_code,
+         ids_off, names_off, cats_off, prices_off, offsets_off, blob_off) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise SnapshotError(f"{path}: not a version {VERSION} menu snapshot")
+
+        self._count = n
+        self._blob_off = blob_off
+        view = memoryview(self._map)
+        if sys.byteorder == "little":
+            self._ids = view[ids_off:ids_off + 8 * n].cast("q")
+            self._names = view[names_off:names_off + 4 * n].cast("I")
+            self._cats = view[cats_off:cats_off + 4 * n].cast("I")
+            self._prices = view[prices_off:prices_off + 8 * n].cast("q")
+            self._offsets = view[offsets_off:offsets_off + 8 * (string_count + 1)].cast("Q")
+        else:  # big-endian host: decode the columns once
+            self._ids = struct.unpack_from(f"<{n}q", self._map, ids_off)
+            self._names = struct.unpack_from(f"<{n}I", self._map, names_off)
+            self._cats = struct.unpack_from(f"<{n}I", self._map, cats_off)
+            self._prices = struct.unpack_from(f"<{n}q", self._map, prices_off)
+            self._offsets = struct.unpack_from(f"<{string_count + 1}Q", self._map, offsets_off)
+
+        self._strings: Dict[int, str] = {}
+        self._food_cache: Dict[int, Food] = {}
+        self._index: Optional[MenuIndex] = None
+        self.outlet_name = self._string(name_code)
+        self.outlet_id = self._string(id_code)
+
+    def _string(self, code: int) -> str:
+        text = self._strings.get(code)
+        if text is None:
+            start = self._blob_off + self._offsets[code]
+            end = self._blob_off + self._offsets[code + 1]
+            text = self._strings[code] = self._map[start:end].decode("utf-8")
+        return text
+
+    def _food_at(self, row: int) -> Food:
+        food = self._food_cache.get(row)
+        if food is None:
+            food = self._food_cache[row] = Food(
+                self._ids[row],
+                self._string(self._names[row]),
+                self._string(self._cats[row]),
+                self._prices[row] / 100,
+            )
+        return food
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get_food(self, food_id: int) -> Optional[Food]:
+        row = bisect_left(self._ids, food_id)
+        if row < self._count and self._ids[row] == food_id:
+            return self._food_at(row)
+        return None
+
+    @property
+    def foods(self) -> List[Food]:
+        return [self._food_at(row) for row in range(self._count)]
+
+    @property
+    def index(self) -> MenuIndex:
+        if self._index is None:
+            self._index = MenuIndex(self.foods)
+        return self._index
+
+    def close(self) -> None:
+        # memoryviews must be released before the mmap can close
+        for name in ("_ids", "_names", "_cats", "_prices", "_offsets"):
+            column = getattr(self, name, None)
+            if isinstance(column, memoryview):
+                column.release()
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "SnapshotMenu":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_snapshot(path: str) -> SnapshotMenu:
+    return SnapshotMenu(path)
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+
+def _synthetic_menu(count: int) -> Menu:
+    base = build_default_menu().foods
+    foods = [
+        Food(i + 1, f"{base[i % len(base)].name} #{i + 1}", base[i % len(base)].category,
+             base[i % len(base)].price)
+        for i in range(count)
+    ]
+    return Menu("Pizza Hut - Catalog", "PH-ALL", foods)
+
+
+def benchmark(count: int, directory: str) -> None:
+    os.makedirs(directory, exist_ok=True)
+    menu = _synthetic_menu(count)
+    snap_path = os.path.join(directory, "menu.fms")
+    json_path = os.path.join(directory, "menu.json")
+    size = write_snapshot(menu, snap_path)
+    with open(json_path, "w", encoding="utf-8") as file:
+        json.dump([[f.id, f.name, f.category, f.price] for f in menu.foods], file)
+
+    start = time.perf_counter()
+    with open(json_path, encoding="utf-8") as file:
+        loaded = Menu(menu.outlet_name, menu.outlet_id, [Food(*row) for row in json.load(file)])
+    loaded.get_food(count // 2)
+    json_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open_snapshot(snap_path) as snap:
+        food = snap.get_food(count // 2)
+        snap_sec = time.perf_counter() - start
+
+    print("=" * 60)
+    print(f"Cold start with {count} foods (snapshot {size / 1024:.0f} KB)")
+    print("=" * 60)
+    print(f"{'JSON parse + Menu()':<40} {json_sec * 1000:>15.2f} ms")
+    print(f"{'open_snapshot + first get_food':<40} {snap_sec * 1000:>15.2f} ms")
+    print(f"Lookup check: {food}")
+    print("=" * 60)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Binary menu snapshots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    write = sub.add_parser("write", help="write the default menu to a snapshot")
+    write.add_argument("path")
+    show = sub.add_parser("show", help="print the menu stored in a snapshot")
+    show.add_argument("path")
+    bench = sub.add_parser("bench", help="compare cold start against JSON")
+    bench.add_argument("--foods", type=int, default=50_000)
+    bench.add_argument("--dir", default="snapshot_bench")
+    args = parser.parse_args(argv)
+
+    if args.command == "write":
+        size = write_snapshot(build_default_menu(), args.path)
+        print(f"Wrote {size} bytes to {args.path}")
+    elif args.command == "show":
+        with open_snapshot(args.path) as snap:
+            snap.print_menu()
+    else:
+        benchmark(args.foods, args.dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+menu_versions.py
+
+Copy-on-write menu versions for lock-free readers.
+Every price change publishes a new immutable MenuVersion that stores only
+the changed foods and points at the previous version; VersionedMenu swaps
+its `current` reference in one assignment. Readers grab `current` once and
+use it without locks - they see either the old menu or the new one, never a
+half-applied update. Once a chain gets MAX_CHAIN deep its deltas are merged
+into one delta over the full base version, so lookups stay O(1) and only the
+changed entries are copied; the catalog itself is copied again only after a
+quarter of it has changed (REBASE_FRACTION).
+
+Carts opened with open_cart() are pinned to the version they started on and
+keep its prices until the order is placed.
+"""
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from foodapp import Cart, Food, Menu, MenuIndex, to_paise
+
+MAX_CHAIN = 8
+REBASE_FRACTION = 0.25
+
+_REMOVED = object()
+
+
+class MenuVersion(Menu):
+    """One immutable menu snapshot. Never mutate a published version."""
+
+    def __init__(
+        self,
+        outlet_name: str,
+        outlet_id: str,
+        version: int,
+        changes: Dict[int, object],
+        parent: Optional["MenuVersion"] = None,
+    ) -> None:
+        # Menu.__init__ is skipped on purpose: only the delta is stored.
+        self.outlet_name = outlet_name
+        self.outlet_id = outlet_id
+        self.version = version
+        # food_id -> Food, or _REMOVED; a full map when parent is None
+        self._changes = changes
+        self._parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self._merged: Optional[Dict[int, Food]] = None
+        self._index: Optional[MenuIndex] = None
+
+    def get_food(self, food_id: int) -> Optional[Food]:
+        version = self
+        while version is not None:
+            food = version._changes.get(food_id)
+            if food is not None:
+                return None if food is _REMOVED else food
+            version = version._parent
+        return None
+
+    def _root(self) -> "MenuVersion":
+        version = self
+        while version._parent is not None:
+            version = version._parent
+        return version
+
+    def _merge(self) -> Dict[int, Food]:
+        # walks the chain iteratively, so no ancestor builds (and keeps) a map of its own
+        chain = []
+        version = self
+        while version._parent is not None:
+            chain.append(version)
+            version = version._parent
+        merged = dict(version._changes)
+        for version in reversed(chain):
+            for food_id, food in version._changes.items():
+                if food is _REMOVED:
+                    merged.pop(food_id, None)
+                else:
+                    merged[food_id] = food
+        return merged
+
+    def foods_by_id(self) -> Dict[int, Food]:
+        """Full id -> Food map for this version (built once, then cached)."""
+        if self._parent is None:
+            return self._changes  # a base version stores the full map already
+        merged = self._merged
+        if merged is None:
+            merged = self._merged = self._merge()
+        return merged
+
+    def drop_caches(self) -> None:
+        """Forget the merged map and index (rebuilt on demand); used once superseded."""
+        self._merged = None
+        self._index = None
+
+    @property
+    def foods(self) -> List[Food]:
+        return list(self.foods_by_id().values())
+
+    @property
+    def index(self) -> MenuIndex:
+        index = self._index
+        if index is None:
+            index = self._index = MenuIndex(self.foods)
+        return index
+
+    def flattened(self) -> "MenuVersion":
+        """Same contents with no parent chain (copies the whole catalog)."""
+        return MenuVersion(self.outlet_name, self.outlet_id, self.version, self._merge())
+
+    def compacted(self) -> "MenuVersion":
+        """
+        Same contents as a single delta over the base version, copying only the
+        changed entries; flattened() instead once the delta reaches
+        REBASE_FRACTION of the catalog.
+        """
+        root = self._root()
+        chain = []
+        version = self
+        while version is not root:
+            chain.append(version)
+            version = version._parent
+        changes: Dict[int, object] = {}
+        for version in reversed(chain):
+            changes.update(version._changes)
+        if len(changes) >= len(root._changes) * REBASE_FRACTION:
+            return self.flattened()
+        return MenuVersion(self.outlet_name, self.outlet_id, self.version, changes, root)
+
+
+class PinnedCart(Cart):
+    """A Cart that prices every item from the menu version it was opened on."""
+
+    def __init__(self, menu_version: MenuVersion) -> None:
+        super().__init__()
+        self.menu_version = menu_version
+
+    def add_by_id(self, food_id: int, qty: int = 1) -> Food:
+        food = self.menu_version.get_food(food_id)
+        if food is None:
+            raise KeyError("Food ID not on this menu version.")
+        self.add(food, qty)
+        return food
+
+
+class VersionedMenu:
+    def __init__(self, menu: Menu) -> None:
+        self._write_lock = threading.Lock()
+        self._current = MenuVersion(
+            menu.outlet_name, menu.outlet_id, 1, {f.id: f for f in menu.foods}
+        )
+
+    # ---- readers (no locks) ----
+
+    @property
+    def current(self) -> MenuVersion:
+        return self._current
+
+    @property
+    def version(self) -> int:
+        return self._current.version
+
+    def get_food(self, food_id: int) -> Optional[Food]:
+        return self._current.get_food(food_id)
+
+    def print_menu(self) -> None:
+        # one reference read, so the whole listing comes from a single version
+        self._current.print_menu()
+
+    def open_cart(self) -> PinnedCart:
+        return PinnedCart(self._current)
+
+    # ---- writers ----
+
+    def publish(self, updates: Iterable[Food] = (), removals: Iterable[int] = ()) -> MenuVersion:
+        """Atomically publish a new version with the given foods added/replaced/removed."""
+        return self.publish_with(lambda base: (updates, removals))
+
+    def publish_with(
+        self, build: Callable[[MenuVersion], Tuple[Iterable[Food], Iterable[int]]]
+    ) -> MenuVersion:
+        """
+        Read-modify-write: build(current) -> (updates, removals), called under the
+        write lock so no other writer can publish between the read and the swap.
+        """
+        with self._write_lock:
+            base = self._current
+            updates, removals = build(base)
+            changes: Dict[int, object] = {}
+            for food_id in removals:
+                if base.get_food(food_id) is not None:
+                    changes[food_id] = _REMOVED
+            for food in updates:
+                changes[food.id] = food
+            if not changes:
+                return base
+            new = MenuVersion(base.outlet_name, base.outlet_id, base.version + 1, changes, base)
+            if new.depth >= MAX_CHAIN:
+                new = new.compacted()
+            self._current = new
+            # pinned carts may still hold base; they can rebuild its map if they need it
+            base.drop_caches()
+            return new
+
+    def set_price(self, food_id: int, price: float) -> MenuVersion:
+        return self.set_prices({food_id: price})
+
+    def set_prices(self, prices: Dict[int, float]) -> MenuVersion:
+        """Several price changes published as one version."""
+
+        def build(base: MenuVersion) -> Tuple[List[Food], List[int]]:
+            updates = []
+            for food_id, price in prices.items():
+                food = base.get_food(food_id)
+                if food is None:
+                    raise KeyError(f"Food ID {food_id} not found on the menu.")
+                if to_paise(price) != food.price_paise:
+                    updates.append(Food(food.id, food.name, food.category, price))
+            return updates, []
+
+        return self.publish_with(build)
+
+
+if __name__ == "__main__":
+    import time
+
+    from foodapp import build_default_menu
+
+    menu = VersionedMenu(build_default_menu())
+    cart = menu.open_cart()
+    cart.add_by_id(1, 2)
+
+    menu.set_price(1, 249.00)
+    print(f"Menu is now v{menu.version}; Margherita costs {menu.get_food(1).price:.2f}")
+    print(f"Cart opened on v{cart.menu_version.version} still bills {cart.total_bill:.2f}")
+
+    stop = threading.Event()
+    reads = [0]
+
+    def reader() -> None:
+        while not stop.is_set():
+            snapshot = menu.current
+            for food_id in range(1, 9):
+                snapshot.get_food(food_id)
+            reads[0] += 1
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for t in readers:
+        t.start()
+    start = time.perf_counter()
+    for n in range(10_000):
+        menu.set_price(1 + n % 8, 100 + n % 400)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for t in readers:
+        t.join()
+    print(f"10000 price updates in {elapsed:.3f}s while readers did {reads[0]} full passes")
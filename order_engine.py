@@ -0,0 +1,304 @@
+"""
+order_engine.py
+
+Headless order engine for foodapp.
+Runs a stream of order events through the same Menu/Cart logic as run_app(),
+without any input() prompts, and reports throughput and per-order latency.
+
+Each event is a dict (one JSON object per line in a JSONL file):
+  {"order_id": "A1", "op": "add", "food_id": 1, "qty": 2}
+  {"order_id": "A1", "op": "update", "food_id": 1, "qty": 3}
+  {"order_id": "A1", "op": "remove", "food_id": 1}
+  {"order_id": "A1", "op": "place"}
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from foodapp import Cart, Menu, build_default_menu, format_invoice
+from order_journal import OrderJournal
+
+OPS = ("add", "update", "remove", "place")
+
+
+# ----------------------------
+# Report
+# ----------------------------
+
+@dataclass
+class EngineReport:
+    events: int = 0
+    orders_placed: int = 0
+    rejected_events: int = 0
+    revenue_paise: int = 0
+    elapsed_sec: float = 0.0
+    latencies_ns: List[int] = field(default_factory=list, repr=False)
+
+    @property
+    def revenue(self) -> float:
+        return self.revenue_paise / 100
+
+    @property
+    def orders_per_sec(self) -> float:
+        if self.elapsed_sec <= 0:
+            return 0.0
+        return self.orders_placed / self.elapsed_sec
+
+    def percentile_ms(self, pct: float) -> float:
+        """Per-order latency percentile in milliseconds (nearest-rank)."""
+        if not self.latencies_ns:
+            return 0.0
+        ordered = sorted(self.latencies_ns)
+        rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+        return ordered[rank] / 1_000_000
+
+    def summary(self) -> str:
+        return "\n".join([
+            "=" * 60,
+            "ORDER ENGINE REPORT",
+            "=" * 60,
+            f"{'Events processed':<28} {self.events:>12}",
+            f"{'Rejected events':<28} {self.rejected_events:>12}",
+            f"{'Orders placed':<28} {self.orders_placed:>12}",
+            f"{'Revenue (₹)':<28} {self.revenue:>12.2f}",
+            f"{'Elapsed (s)':<28} {self.elapsed_sec:>12.3f}",
+            f"{'Orders/sec':<28} {self.orders_per_sec:>12.1f}",
+            f"{'p50 latency (ms)':<28} {self.percentile_ms(50):>12.4f}",
+            f"{'p99 latency (ms)':<28} {self.percentile_ms(99):>12.4f}",
+            "=" * 60,
+        ])
+
+
+# ----------------------------
+# Engine
+# ----------------------------
+
+class OrderEngine:
+    """
+    Applies order events to one Cart per open order_id.
+    On "place", the invoice is rendered and handed to on_invoice (if any),
+    on_placed is called (e.g. to journal the order), and the cart is
+    dropped - exactly what run_app() does after confirmation.
+    """
+
+    def __init__(
+        self,
+        menu: Menu,
+        on_invoice: Optional[Callable[[str, Menu, Cart, str], None]] = None,
+        on_placed: Optional[Callable[[str, Menu, Cart], None]] = None,
+    ) -> None:
+        self.menu = menu
+        self.on_invoice = on_invoice
+        self.on_placed = on_placed
+        # key = order_id, value = Cart
+        self._carts: Dict[str, Cart] = {}
+        # key = order_id, value = time spent on this order so far (ns)
+        self._spent_ns: Dict[str, int] = {}
+        self.report = EngineReport()
+
+    @property
+    def open_orders(self) -> int:
+        return len(self._carts)
+
+    def process(self, event: Optional[dict]) -> bool:
+        """Apply one event. Returns False if the event was rejected."""
+        if not isinstance(event, dict):
+            # unparsable line (None from read_events) or a JSON value that isn't an object
+            self.report.events += 1
+            self.report.rejected_events += 1
+            return False
+        start = time.perf_counter_ns()
+        order_id = str(event.get("order_id", ""))
+        ok = self._apply(order_id, event)
+        spent = time.perf_counter_ns() - start
+
+        self.report.events += 1
+        if not ok:
+            self.report.rejected_events += 1
+        if event.get("op") == "place" and ok:
+            self.report.latencies_ns.append(self._spent_ns.pop(order_id, 0) + spent)
+        elif order_id in self._carts:
+            self._spent_ns[order_id] = self._spent_ns.get(order_id, 0) + spent
+        return ok
+
+    def _apply(self, order_id: str, event: dict) -> bool:
+        op = event.get("op")
+        if not order_id or op not in OPS:
+            return False
+        # malformed ids/quantities ("x", null) reject the event instead of stopping run()
+        try:
+            food_id = int(event.get("food_id", 0))
+            qty = int(event.get("qty", 1 if op == "add" else 0))
+        except (TypeError, ValueError):
+            return False
+
+        if op == "add":
+            food = self.menu.get_food(food_id)
+            if not food or qty <= 0:
+                return False
+            self._carts.setdefault(order_id, Cart()).add(food, qty)
+            return True
+
+        cart = self._carts.get(order_id)
+        if cart is None:
+            return False
+
+        if op == "update":
+            try:
+                cart.update_qty(food_id, qty)
+            except KeyError:
+                return False
+            return True
+
+        if op == "remove":
+            cart.remove(food_id)
+            return True
+
+        # op == "place"
+        if cart.is_empty():
+            return False
+        if self.on_invoice is not None:
+            self.on_invoice(order_id, self.menu, cart, format_invoice(self.menu, cart))
+        if self.on_placed is not None:
+            self.on_placed(order_id, self.menu, cart)
+        self.report.orders_placed += 1
+        self.report.revenue_paise += cart.total_paise
+        del self._carts[order_id]
+        return True
+
+    def run(self, events: Iterable[Optional[dict]]) -> EngineReport:
+        start = time.perf_counter()
+        for event in events:
+            self.process(event)
+        self.report.elapsed_sec += time.perf_counter() - start
+        return self.report
+
+
+# ----------------------------
+# Event Sources
+# ----------------------------
+
+def read_events(path: str) -> Iterator[Optional[dict]]:
+    """Stream events from a JSONL file, skipping blank lines (None for unparsable ones)."""
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                event = None
+            yield event
+
+
+def generate_events(
+    menu: Menu, orders: int, max_lines: int = 5, seed: int = 42
+) -> Iterator[dict]:
+    """Synthetic but realistic event stream: a few adds, an edit or two, then place."""
+    rng = random.Random(seed)
+    food_ids = [f.id for f in menu.foods]
+    for n in range(orders):
+        order_id = f"O{n}"
+        picked = rng.sample(food_ids, k=rng.randint(1, min(max_lines, len(food_ids))))
+        for food_id in picked:
+            yield {"order_id": order_id, "op": "add", "food_id": food_id, "qty": rng.randint(1, 3)}
+        if rng.random() < 0.3:
+            yield {"order_id": order_id, "op": "update", "food_id": picked[0], "qty": rng.randint(1, 4)}
+        if len(picked) > 1 and rng.random() < 0.1:
+            yield {"order_id": order_id, "op": "remove", "food_id": picked[-1]}
+        yield {"order_id": order_id, "op": "place"}
+
+
+def write_events(path: str, events: Iterable[dict]) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as file:
+        for event in events:
+            file.write(json.dumps(event) + "\n")
+            count += 1
+    return count
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run order events through foodapp headlessly.")
+    parser.add_argument("events", nargs="?", help="JSONL file of order events")
+    parser.add_argument("--generate", type=int, metavar="N",
+                        help="use N synthetic orders instead of a file")
+    parser.add_argument("--write-events", metavar="PATH",
+                        help="with --generate, save the events to PATH and exit")
+    parser.add_argument("--invoices", metavar="PATH",
+                        help="write rendered invoices to PATH ('-' for stdout)")
+    parser.add_argument("--journal", metavar="DIR",
+                        help="append placed orders to an order journal in DIR")
+    args = parser.parse_args(argv)
+
+    menu = build_default_menu()
+    if args.generate:
+        events = generate_events(menu, args.generate)
+        if args.write_events:
+            count = write_events(args.write_events, events)
+            print(f"Wrote {count} events to {args.write_events}")
+            return
+    elif args.events:
+        events = read_events(args.events)
+    else:
+        parser.error("give an events file or --generate N")
+
+    out: Optional[TextIO] = None
+    if args.invoices == "-":
+        out = sys.stdout
+    elif args.invoices:
+        out = open(args.invoices, "w", encoding="utf-8")
+
+    def write_invoice(order_id: str, menu: Menu, cart: Cart, text: str) -> None:
+        out.write(text + "\n")
+
+    journal = OrderJournal(args.journal) if args.journal else None
+    journal_errors: List[BaseException] = []
+
+    def journal_failed(future: "Future[int]") -> None:
+        if future.exception() is not None:
+            journal_errors.append(future.exception())
+
+    def journal_order(order_id: str, menu: Menu, cart: Cart) -> None:
+        # not awaited here: group commit batches these; close() waits for the last fsync
+        journal.record_order(menu, cart).add_done_callback(journal_failed)
+
+    engine = OrderEngine(
+        menu,
+        on_invoice=write_invoice if out else None,
+        on_placed=journal_order if journal else None,
+    )
+    try:
+        report = engine.run(events)
+    finally:
+        if out is not None and out is not sys.stdout:
+            out.close()
+        if journal is not None:
+            journal.close()
+
+    if journal_errors:
+        print(f"ERROR: {len(journal_errors)} placed order(s) were NOT journaled "
+              f"(first error: {journal_errors[0]!r}); they are still counted below.",
+              file=sys.stderr)
+    print(report.summary())
+    if journal is not None:
+        print(f"Journaled {journal.records} order(s) in {journal.batches} fsync batch(es).")
+    if engine.open_orders:
+        print(f"Note: {engine.open_orders} order(s) were never placed.")
+    if journal_errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
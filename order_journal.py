@@ -0,0 +1,395 @@
+"""
+order_journal.py
+
+Append-only journal of placed orders with group commit.
+Orders are queued by callers and written by one background thread, which
+batches everything that arrives within max_delay (or up to max_batch orders)
+into a single write + fsync. append() returns a Future that completes only
+after the order is on disk, so nothing is acknowledged before it is durable.
+
+Files: <dir>/orders-000001.jsonl, orders-000002.jsonl, ... (rotated by size)
+       <dir>/totals.json  (daily totals folded in by compaction)
+
+CLI:
+  python order_journal.py totals <dir>    daily totals rebuilt from the journal
+  python order_journal.py compact <dir>   fold sealed segments into totals.json
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import warnings
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from foodapp import Cart, Menu
+
+SEGMENT_PREFIX = "orders-"
+SEGMENT_SUFFIX = ".jsonl"
+TOTALS_FILE = "totals.json"
+
+_STOP = object()
+
+
+# ----------------------------
+# Segment Helpers
+# ----------------------------
+
+def segment_name(number: int) -> str:
+    return f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+
+def list_segments(directory: str) -> List[Tuple[int, str]]:
+    """(number, path) of every segment, oldest first."""
+    segments = []
+    if not os.path.isdir(directory):
+        return segments
+    for name in os.listdir(directory):
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+            number = name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+            if number.isdigit():
+                segments.append((int(number), os.path.join(directory, name)))
+    return sorted(segments)
+
+
+def _fsync_dir(directory: str) -> None:
+    # Makes a newly created segment file itself durable; not supported on Windows.
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def repair_tail(path: str) -> int:
+    """
+    Cut a torn final line (crash mid-write) off a segment so the next append
+    starts on a fresh line. Returns the number of bytes removed.
+    """
+    with open(path, "r+b") as file:
+        end = file.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            step = min(64 * 1024, pos)
+            file.seek(pos - step)
+            block = file.read(step)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                pos = pos - step + newline + 1
+                break
+            pos -= step
+        if pos == end:
+            return 0
+        file.truncate(pos)
+        file.flush()
+        os.fsync(file.fileno())
+        return end - pos
+
+
+def read_segment(path: str) -> Iterator[dict]:
+    """Records in one segment. A torn final line (crash mid-write) is ignored."""
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if not line.endswith("\n"):
+                break
+            yield json.loads(line)
+
+
+def order_record(menu: Menu, cart: Cart) -> dict:
+    return {
+        "outlet_id": menu.outlet_id,
+        "lines": [
+            [item.food.id, item.food.name, item.food.category, item.qty, item.food.price_paise]
+            for item in cart.items
+        ],
+        "total_paise": cart.total_paise,
+    }
+
+
+# ----------------------------
+# Journal
+# ----------------------------
+
+class OrderJournal:
+    def __init__(
+        self,
+        directory: str = "order_journal",
+        max_batch: int = 512,
+        max_delay: float = 0.005,
+        segment_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.directory = directory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        segments = list_segments(directory)
+        if segments:
+            repair_tail(segments[-1][1])
+        self._segment_no = segments[-1][0] if segments else 1
+        self._seq = self._last_seq(segments)
+        self._file = self._open_segment(self._segment_no)
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        # set when the writer can't go on (e.g. the next segment won't open);
+        # every later record fails instead of waiting forever
+        self._failure: Optional[BaseException] = None
+        self.batches = 0
+        self.records = 0
+        self._writer = threading.Thread(target=self._run, name="order-journal", daemon=True)
+        self._writer.start()
+
+    def _last_seq(self, segments: List[Tuple[int, str]]) -> int:
+        for _, path in reversed(segments):
+            last = None
+            for last in read_segment(path):
+                pass
+            if last is not None:
+                return last["seq"]
+        totals = load_totals(self.directory)
+        return totals["through_seq"]
+
+    def _open_segment(self, number: int):
+        path = os.path.join(self.directory, segment_name(number))
+        created = not os.path.exists(path)
+        file = open(path, "ab")
+        if created:
+            _fsync_dir(self.directory)
+        return file
+
+    # ---- producer side ----
+
+    def append(self, record: dict) -> "Future[int]":
+        """Queue a record; the Future resolves to its sequence number once fsynced."""
+        if self._closed:
+            raise RuntimeError("Journal is closed.")
+        future: "Future[int]" = Future()
+        self._queue.put((record, future))
+        return future
+
+    def record_order(self, menu: Menu, cart: Cart) -> "Future[int]":
+        return self.append(order_record(menu, cart))
+
+    def close(self) -> None:
+        """Flush everything queued so far, then stop the writer."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._file.close()
+
+    def __enter__(self) -> "OrderJournal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---- writer thread ----
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            if self._failure is not None:
+                self._fail(batch, RuntimeError(f"Journal writer stopped: {self._failure!r}"))
+                continue
+            try:
+                self._commit(batch)
+            except Exception as err:
+                self._failure = err
+                self._fail(batch, err)
+
+    @staticmethod
+    def _fail(batch: list, err: BaseException) -> None:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(err)
+
+    def _commit(self, batch: list) -> None:
+        now = time.time()
+        chunks = []
+        accepted = []
+        for record, future in batch:
+            try:
+                record = dict(record, seq=self._seq + 1, ts=record.get("ts", now))
+                chunks.append(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n")
+            except Exception as err:
+                # e.g. a value json can't encode: fail this record only, it gets no seq
+                future.set_exception(err)
+                continue
+            self._seq += 1
+            accepted.append(future)
+        if not accepted:
+            return
+        first_seq = self._seq - len(accepted) + 1
+        start = self._file.tell()
+        try:
+            self._file.write("".join(chunks).encode("utf-8"))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except Exception as err:
+            # drop whatever part of the batch reached the file and give the seqs back
+            try:
+                self._file.truncate(start)
+            except OSError:
+                pass
+            self._seq = first_seq - 1
+            for future in accepted:
+                future.set_exception(err)
+            return
+        self.batches += 1
+        self.records += len(accepted)
+        for offset, future in enumerate(accepted):
+            future.set_result(first_seq + offset)
+        if self._file.tell() >= self.segment_bytes:
+            self._file.close()
+            self._segment_no += 1
+            self._file = self._open_segment(self._segment_no)
+
+
+# ----------------------------
+# Replay / Compaction
+# ----------------------------
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts).date().isoformat()
+
+
+def load_totals(directory: str) -> dict:
+    path = os.path.join(directory, TOTALS_FILE)
+    if not os.path.exists(path):
+        return {"through_seq": 0, "days": {}}
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def replay(directory: str, after_seq: int = 0) -> Iterator[dict]:
+    for _, path in list_segments(directory):
+        for record in read_segment(path):
+            if record["seq"] > after_seq:
+                yield record
+
+
+class CompactedHistoryError(RuntimeError):
+    """Raised when orders needed for line-item history were folded into totals.json."""
+
+
+def replay_history(directory: str, allow_partial: bool = False) -> Iterator[dict]:
+    """
+    replay() for consumers that need every order's lines (analytics, indexes).
+    compact() keeps only daily totals for the orders it folds away, so if the
+    journal no longer starts at seq 1 this raises CompactedHistoryError
+    (or, with allow_partial=True, warns and replays what is left).
+    """
+    records = replay(directory)
+    first = next(records, None)
+    missing = first["seq"] - 1 if first is not None else load_totals(directory)["through_seq"]
+    if missing > 0:
+        message = (
+            f"{directory}: orders 1-{missing} were compacted into {TOTALS_FILE}; "
+            "only later orders have line items"
+        )
+        if not allow_partial:
+            raise CompactedHistoryError(message)
+        warnings.warn(message, stacklevel=2)
+    if first is not None:
+        yield first
+        yield from records
+
+
+def daily_totals(directory: str) -> Dict[str, Dict[str, int]]:
+    """{day: {"orders": n, "total_paise": p}} from totals.json plus un-compacted segments."""
+    totals = load_totals(directory)
+    days = {day: dict(values) for day, values in totals["days"].items()}
+    for record in replay(directory, after_seq=totals["through_seq"]):
+        day = days.setdefault(_day(record["ts"]), {"orders": 0, "total_paise": 0})
+        day["orders"] += 1
+        day["total_paise"] += record["total_paise"]
+    return days
+
+
+def compact(directory: str) -> int:
+    """
+    Fold every sealed segment (all but the newest) into totals.json and delete it.
+    Must not run while a journal is rotating in the same directory. Returns segments removed.
+    Line items of folded orders are gone afterwards: save analytics (.npz) first.
+    """
+    segments = list_segments(directory)[:-1]
+    if not segments:
+        return 0
+    totals = load_totals(directory)
+    through = totals["through_seq"]
+    for _, path in segments:
+        for record in read_segment(path):
+            if record["seq"] <= through:
+                continue
+            day = totals["days"].setdefault(_day(record["ts"]), {"orders": 0, "total_paise": 0})
+            day["orders"] += 1
+            day["total_paise"] += record["total_paise"]
+            through = record["seq"]
+    totals["through_seq"] = through
+
+    # write-then-rename so a crash never leaves a half-written totals file
+    tmp = os.path.join(directory, TOTALS_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as file:
+        json.dump(totals, file, indent=2, sort_keys=True)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp, os.path.join(directory, TOTALS_FILE))
+    _fsync_dir(directory)
+    for _, path in segments:
+        os.remove(path)
+    return len(segments)
+
+
+def print_totals(days: Dict[str, Dict[str, int]]) -> None:
+    print("\n" + "=" * 60)
+    print("DAILY TOTALS")
+    print("=" * 60)
+    print(f"{'Day':<20} {'Orders':>15} {'Total (₹)':>20}")
+    print("-" * 60)
+    for day in sorted(days):
+        print(f"{day:<20} {days[day]['orders']:>15} {days[day]['total_paise'] / 100:>20.2f}")
+    print("=" * 60)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Order journal tools.")
+    parser.add_argument("command", choices=["totals", "compact"])
+    parser.add_argument("directory")
+    args = parser.parse_args(argv)
+
+    if args.command == "compact":
+        removed = compact(args.directory)
+        print(f"Compacted {removed} segment(s).")
+    print_totals(daily_totals(args.directory))
+
+
+if __name__ == "__main__":
+    main()
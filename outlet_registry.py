@@ -0,0 +1,283 @@
+"""
+outlet_registry.py
+
+Multi-outlet menu registry backed by one shared, columnar food store.
+Foods are kept in parallel arrays (id, name, category, price in paise) with
+interned strings, and every outlet is a lightweight OutletMenu view holding
+only its food ids and its own price overrides. Outlets with the same item
+list share the same id array.
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from foodapp import Food, Menu, MenuIndex, build_default_menu, to_paise
+
+
+# ----------------------------
+# Columnar Food Store
+# ----------------------------
+
+class FoodStore:
+    """Append-only column store for the whole catalog (one row per food id)."""
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.name_codes = array("l")
+        self.category_codes = array("l")
+        self.prices_paise = array("q")
+        # interned string tables (code -> string, string -> code)
+        self._strings: List[str] = []
+        self._string_codes: Dict[str, int] = {}
+        # key = food_id, value = row number
+        self._rows: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _intern(self, text: str) -> int:
+        code = self._string_codes.get(text)
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(sys.intern(text))
+            self._string_codes[text] = code
+        return code
+
+    def add(self, food_id: int, name: str, category: str, price: float) -> int:
+        """Add (or replace) a food and return its row number."""
+        row = self._rows.get(food_id)
+        name_code = self._intern(name)
+        category_code = self._intern(category)
+        paise = to_paise(price)
+        if row is None:
+            row = len(self.ids)
+            self.ids.append(food_id)
+            self.name_codes.append(name_code)
+            self.category_codes.append(category_code)
+            self.prices_paise.append(paise)
+            self._rows[food_id] = row
+        else:
+            self.name_codes[row] = name_code
+            self.category_codes[row] = category_code
+            self.prices_paise[row] = paise
+        return row
+
+    def add_many(self, foods: Iterable[Food]) -> None:
+        for f in foods:
+            self.add(f.id, f.name, f.category, f.price)
+
+    def row_of(self, food_id: int) -> Optional[int]:
+        return self._rows.get(food_id)
+
+    def name(self, row: int) -> str:
+        return self._strings[self.name_codes[row]]
+
+    def category(self, row: int) -> str:
+        return self._strings[self.category_codes[row]]
+
+    def food(self, row: int, price_paise: Optional[int] = None) -> Food:
+        """Materialize one row as a Food (optionally with an outlet price)."""
+        if price_paise is None:
+            price_paise = self.prices_paise[row]
+        return Food(
+            self.ids[row],
+            self._strings[self.name_codes[row]],
+            self._strings[self.category_codes[row]],
+            price_paise / 100,
+        )
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the columns and string table."""
+        columns = sum(
+            col.itemsize * len(col)
+            for col in (self.ids, self.name_codes, self.category_codes, self.prices_paise)
+        )
+        strings = sum(sys.getsizeof(s) for s in self._strings)
+        return columns + strings + sys.getsizeof(self._rows)
+
+
+# ----------------------------
+# Outlet View
+# ----------------------------
+
+class OutletMenu(Menu):
+    """
+    A Menu that stores no Food objects of its own.
+    It keeps a sorted array of food ids (possibly shared with other outlets)
+    and a small dict of price overrides; Foods are built on demand.
+    """
+
+    def __init__(
+        self,
+        store: FoodStore,
+        outlet_name: str,
+        outlet_id: str,
+        food_ids: array,
+        price_overrides: Optional[Dict[int, int]] = None,
+    ) -> None:
+        # Menu.__init__ is skipped on purpose: nothing is copied per outlet.
+        self.outlet_name = outlet_name
+        self.outlet_id = outlet_id
+        self._store = store
+        self._food_ids = food_ids
+        # key = food_id, value = outlet price in paise
+        self._overrides = price_overrides or {}
+        self._index: Optional[MenuIndex] = None
+
+    def __len__(self) -> int:
+        return len(self._food_ids)
+
+    def __contains__(self, food_id: int) -> bool:
+        i = bisect_left(self._food_ids, food_id)
+        return i < len(self._food_ids) and self._food_ids[i] == food_id
+
+    def get_food(self, food_id: int) -> Optional[Food]:
+        if food_id not in self:
+            return None
+        row = self._store.row_of(food_id)
+        if row is None:
+            return None
+        return self._store.food(row, self._overrides.get(food_id))
+
+    @property
+    def foods(self) -> List[Food]:
+        return [self.get_food(food_id) for food_id in self._food_ids]
+
+    @property
+    def index(self) -> MenuIndex:
+        # Search structures are only built for outlets that are actually searched.
+        if self._index is None:
+            self._index = MenuIndex(self.foods)
+        return self._index
+
+    def set_price(self, food_id: int, price: float) -> None:
+        if food_id not in self:
+            raise KeyError("Item not found in this outlet.")
+        self._overrides[food_id] = to_paise(price)
+        self._index = None
+
+
+# ----------------------------
+# Registry
+# ----------------------------
+
+class OutletRegistry:
+    def __init__(self, store: Optional[FoodStore] = None) -> None:
+        self.store = store or FoodStore()
+        # key = outlet_id, value = OutletMenu
+        self._outlets: Dict[str, OutletMenu] = {}
+        # identical item lists are stored once; key = raw bytes of the id array
+        self._shared_id_arrays: Dict[bytes, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._outlets)
+
+    def _shared_ids(self, food_ids: Iterable[int]) -> array:
+        ids = array("q", sorted(set(food_ids)))
+        key = ids.tobytes()
+        return self._shared_id_arrays.setdefault(key, ids)
+
+    def add_outlet(
+        self,
+        outlet_name: str,
+        outlet_id: str,
+        food_ids: Iterable[int],
+        price_overrides: Optional[Dict[int, float]] = None,
+    ) -> OutletMenu:
+        ids = self._shared_ids(food_ids)
+        missing = [food_id for food_id in ids if self.store.row_of(food_id) is None]
+        if missing:
+            raise KeyError(f"Unknown food ids for outlet {outlet_id}: {missing[:5]}")
+        overrides = None
+        if price_overrides:
+            overrides = {food_id: to_paise(price) for food_id, price in price_overrides.items()}
+        menu = OutletMenu(self.store, outlet_name, outlet_id, ids, overrides)
+        self._outlets[outlet_id] = menu
+        return menu
+
+    def add_menu(self, menu: Menu) -> OutletMenu:
+        """Move an ordinary Menu into the registry (prices differing from the store become overrides)."""
+        overrides: Dict[int, float] = {}
+        for f in menu.foods:
+            row = self.store.row_of(f.id)
+            if row is None:
+                self.store.add(f.id, f.name, f.category, f.price)
+            elif self.store.prices_paise[row] != f.price_paise:
+                overrides[f.id] = f.price
+        return self.add_outlet(menu.outlet_name, menu.outlet_id, (f.id for f in menu.foods), overrides)
+
+    def get(self, outlet_id: str) -> Optional[OutletMenu]:
+        return self._outlets.get(outlet_id)
+
+    @property
+    def outlets(self) -> List[OutletMenu]:
+        return list(self._outlets.values())
+
+
+# ----------------------------
+# Memory Comparison
+# ----------------------------
+
+def _measure(build) -> Tuple[int, float, object]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed, result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare per-outlet Menus vs the shared registry.")
+    parser.add_argument("--outlets", type=int, default=300)
+    parser.add_argument("--items", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    base = build_default_menu().foods
+    catalog = [
+        Food(i + 1, f"{base[i % len(base)].name} #{i + 1}", base[i % len(base)].category,
+             base[i % len(base)].price + (i % 7) * 10)
+        for i in range(args.items)
+    ]
+
+    def plain_menus() -> List[Menu]:
+        menus = []
+        for n in range(args.outlets):
+            # every outlet re-creates its own Food objects, as a real loader would
+            foods = [Food(f.id, "".join(f.name), "".join(f.category), f.price) for f in catalog]
+            menus.append(Menu(f"Outlet {n}", f"PH-{n:04d}", foods))
+        return menus
+
+    def registry() -> OutletRegistry:
+        reg = OutletRegistry()
+        reg.store.add_many(catalog)
+        ids = [f.id for f in catalog]
+        for n in range(args.outlets):
+            overrides = {ids[n % len(ids)]: 99.0} if n % 10 == 0 else None
+            reg.add_outlet(f"Outlet {n}", f"PH-{n:04d}", ids, overrides)
+        return reg
+
+    plain_bytes, plain_sec, _ = _measure(plain_menus)
+    reg_bytes, reg_sec, reg = _measure(registry)
+
+    print("=" * 60)
+    print(f"{args.outlets} outlets x {args.items} items")
+    print("=" * 60)
+    print(f"{'Layout':<20} {'Peak memory (KB)':>18} {'Load time (s)':>18}")
+    print("-" * 60)
+    print(f"{'Menu per outlet':<20} {plain_bytes / 1024:>18.1f} {plain_sec:>18.3f}")
+    print(f"{'OutletRegistry':<20} {reg_bytes / 1024:>18.1f} {reg_sec:>18.3f}")
+    print("-" * 60)
+    print(f"Memory reduction: {plain_bytes / max(reg_bytes, 1):.1f}x")
+    print(f"Sample lookup: {reg.get('PH-0000').get_food(1)}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
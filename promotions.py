@@ -0,0 +1,287 @@
+"""
+promotions.py
+
+Promotion / discount engine for foodapp carts.
+Rules are compiled once into lookup tables keyed by food id and category,
+so pricing a cart only looks at rules that can touch its items:
+O(items + matching rules) instead of O(rules x items).
+
+Stacking policy:
+- line-level promos (category % off, buy-N-get-M) don't stack; each cart
+  line gets the single best one
+- combo discounts apply on top, once per complete set in the cart; a unit
+  counts toward at most one combo, biggest combo discount first
+- at most one bill-threshold discount (the best one reached), applied to the
+  amount after the line and combo discounts
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from foodapp import Cart, to_paise
+
+
+# ----------------------------
+# Rule Types
+# ----------------------------
+
+@dataclass(frozen=True)
+class ComboDeal:
+    """Flat discount for every complete set of food_ids in the cart ("pizza + coke")."""
+    name: str
+    food_ids: Tuple[int, ...]
+    discount: float
+
+
+@dataclass(frozen=True)
+class CategoryPercentOff:
+    name: str
+    category: str
+    percent: float
+
+
+@dataclass(frozen=True)
+class BuyNGetM:
+    """For every buy + free units of food_id, `free` of them cost nothing."""
+    name: str
+    food_id: int
+    buy: int
+    free: int
+
+
+@dataclass(frozen=True)
+class BillThreshold:
+    """Discount once the bill reaches min_bill: a flat amount and/or a percent."""
+    name: str
+    min_bill: float
+    discount: float = 0.0
+    percent: float = 0.0
+
+
+Rule = Union[ComboDeal, CategoryPercentOff, BuyNGetM, BillThreshold]
+
+
+class PromotionError(ValueError):
+    """Raised when a rule is malformed."""
+
+
+# ----------------------------
+# Result
+# ----------------------------
+
+@dataclass
+class PricedCart:
+    subtotal_paise: int
+    discounts: List[Tuple[str, int]] = field(default_factory=list)
+
+    @property
+    def discount_paise(self) -> int:
+        return sum(amount for _, amount in self.discounts)
+
+    @property
+    def total_paise(self) -> int:
+        return max(0, self.subtotal_paise - self.discount_paise)
+
+    @property
+    def subtotal(self) -> float:
+        return self.subtotal_paise / 100
+
+    @property
+    def total(self) -> float:
+        return self.total_paise / 100
+
+
+# ----------------------------
+# Engine
+# ----------------------------
+
+def _validate(rule: Rule) -> None:
+    if isinstance(rule, ComboDeal):
+        if len(set(rule.food_ids)) < 2 or rule.discount <= 0:
+            raise PromotionError(f"{rule.name}: a combo needs 2+ distinct items and a positive discount.")
+    elif isinstance(rule, CategoryPercentOff):
+        if not 0 < rule.percent <= 100:
+            raise PromotionError(f"{rule.name}: percent must be in (0, 100].")
+    elif isinstance(rule, BuyNGetM):
+        if rule.buy <= 0 or rule.free <= 0:
+            raise PromotionError(f"{rule.name}: buy and free must be greater than 0.")
+    elif isinstance(rule, BillThreshold):
+        if rule.min_bill < 0 or (rule.discount <= 0 and rule.percent <= 0):
+            raise PromotionError(f"{rule.name}: needs min_bill >= 0 and a discount or percent.")
+    else:
+        raise PromotionError(f"Unknown rule type: {type(rule).__name__}")
+
+
+class PromotionEngine:
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self.rules: List[Rule] = list(rules)
+        for rule in self.rules:
+            _validate(rule)
+        self._compile()
+
+    def _compile(self) -> None:
+        # category (lower) -> best (basis points, name); only the best % per category can win
+        self._category_bp: Dict[str, Tuple[int, str]] = {}
+        # food_id -> [(buy, free, name)]
+        self._bogo: Dict[int, List[Tuple[int, int, str]]] = {}
+        # food_id -> [combo index]; combo index -> (distinct ids, discount paise, name)
+        self._combos_by_food: Dict[int, List[int]] = {}
+        self._combos: List[Tuple[Tuple[int, ...], int, str]] = []
+        thresholds: List[Tuple[int, int, int, str]] = []
+
+        for rule in self.rules:
+            if isinstance(rule, CategoryPercentOff):
+                key = rule.category.lower()
+                bp = int(round(rule.percent * 100))
+                if bp > self._category_bp.get(key, (0, ""))[0]:
+                    self._category_bp[key] = (bp, rule.name)
+            elif isinstance(rule, BuyNGetM):
+                self._bogo.setdefault(rule.food_id, []).append((rule.buy, rule.free, rule.name))
+            elif isinstance(rule, ComboDeal):
+                ids = tuple(sorted(set(rule.food_ids)))
+                index = len(self._combos)
+                self._combos.append((ids, to_paise(rule.discount), rule.name))
+                for food_id in ids:
+                    self._combos_by_food.setdefault(food_id, []).append(index)
+            else:
+                thresholds.append(
+                    (to_paise(rule.min_bill), to_paise(rule.discount),
+                     int(round(rule.percent * 100)), rule.name)
+                )
+
+        thresholds.sort(key=lambda t: t[0])
+        self._threshold_mins: List[int] = [t[0] for t in thresholds]
+        self._thresholds = thresholds
+
+    def price(self, cart: Cart) -> PricedCart:
+        category_bp = self._category_bp
+        bogo = self._bogo
+        combos_by_food = self._combos_by_food
+
+        result = PricedCart(subtotal_paise=cart.total_paise)
+        discounts = result.discounts
+        qty_by_id: Dict[int, int] = {}
+        combo_hits: Dict[int, int] = {}
+
+        for item in cart.items:
+            food = item.food
+            unit = food.price_paise
+            qty_by_id[food.id] = item.qty
+
+            best, best_name = 0, ""
+            pct = category_bp.get(food.category.lower())
+            if pct is not None:
+                best, best_name = unit * item.qty * pct[0] // 10_000, pct[1]
+            for buy, free, name in bogo.get(food.id, ()):
+                amount = (item.qty // (buy + free)) * free * unit
+                if amount > best:
+                    best, best_name = amount, name
+            if best:
+                discounts.append((best_name, best))
+
+            for index in combos_by_food.get(food.id, ()):
+                combo_hits[index] = combo_hits.get(index, 0) + 1
+
+        complete = [
+            index for index, hits in combo_hits.items() if hits == len(self._combos[index][0])
+        ]
+        if complete:
+            # overlapping combos share units: take sets out of what's left, best deal first
+            complete.sort(key=lambda index: (-self._combos[index][1], index))
+            remaining = qty_by_id
+            for index in complete:
+                ids, amount, name = self._combos[index]
+                sets = min(remaining[food_id] for food_id in ids)
+                if sets:
+                    for food_id in ids:
+                        remaining[food_id] -= sets
+                    discounts.append((name, amount * sets))
+
+        if self._thresholds:
+            net = result.total_paise
+            i = bisect_right(self._threshold_mins, net)
+            best, best_name = 0, ""
+            # every threshold at or below the bill qualifies; pick the largest discount
+            for _, flat, bp, name in self._thresholds[:i]:
+                amount = flat + net * bp // 10_000
+                if amount > best:
+                    best, best_name = amount, name
+            if best:
+                discounts.append((best_name, min(best, net)))
+
+        return result
+
+    def price_many(self, carts: Sequence[Cart]) -> List[PricedCart]:
+        """Price a batch of carts against the same compiled tables."""
+        price = self.price
+        return [price(cart) for cart in carts]
+
+
+def print_priced_cart(priced: PricedCart, title: Optional[str] = None) -> None:
+    print("-" * 60)
+    if title:
+        print(title)
+    print(f"{'SUBTOTAL (₹)':>47} {priced.subtotal:>12.2f}")
+    for name, amount in priced.discounts:
+        print(f"{name[:46]:>47} {-amount / 100:>12.2f}")
+    print(f"{'TOTAL AFTER PROMOS (₹)':>47} {priced.total:>12.2f}")
+    print("-" * 60)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from foodapp import build_default_menu
+
+    menu = build_default_menu()
+    engine = PromotionEngine([
+        ComboDeal("Margherita + Coke", (1, 7), 40.0),
+        CategoryPercentOff("Sides 20% off", "Sides", 20),
+        BuyNGetM("Brownie buy 2 get 1", 8, 2, 1),
+        BillThreshold("₹100 off above ₹999", 999, discount=100),
+        BillThreshold("10% off above ₹1999", 1999, percent=10),
+    ])
+
+    cart = Cart()
+    for food_id, qty in [(1, 2), (7, 1), (5, 2), (8, 3)]:
+        cart.add(menu.get_food(food_id), qty)
+    print_priced_cart(engine.price(cart), "Sample cart")
+
+    # overlapping combos: one Margherita can't earn both deals
+    overlap = PromotionEngine([
+        ComboDeal("Margherita + Coke", (1, 7), 40.0),
+        ComboDeal("Margherita + Garlic Bread", (1, 5), 40.0),
+    ])
+    cart = Cart()
+    for food_id in (1, 7, 5):
+        cart.add(menu.get_food(food_id), 1)
+    priced = overlap.price(cart)
+    assert len(priced.discounts) == 1, priced.discounts
+    print_priced_cart(priced, "Overlapping combos (one Margherita)")
+
+    # promo-day scale: thousands of rules over a large catalog
+    rng = random.Random(3)
+    many_rules: List[Rule] = []
+    for n in range(5_000):
+        a, b = rng.sample(range(1, 10_000), 2)
+        many_rules.append(ComboDeal(f"combo {n}", (a, b), 10.0))
+        many_rules.append(BuyNGetM(f"bogo {n}", rng.randint(1, 10_000), 2, 1))
+    start = time.perf_counter()
+    big_engine = PromotionEngine(many_rules + engine.rules)
+    compile_sec = time.perf_counter() - start
+
+    from foodapp import Food
+    carts = []
+    for _ in range(20_000):
+        c = Cart()
+        for food_id in rng.sample(range(1, 10_000), 5):
+            c.add(Food(food_id, f"Item {food_id}", "Pizza", 99.0 + food_id % 300), rng.randint(1, 4))
+        carts.append(c)
+    start = time.perf_counter()
+    big_engine.price_many(carts)
+    price_sec = time.perf_counter() - start
+    print(f"{len(big_engine.rules)} rules compiled in {compile_sec:.3f}s; "
+          f"priced {len(carts)} carts in {price_sec:.3f}s "
+          f"({len(carts) / price_sec:,.0f} carts/sec)")
@@ -0,0 +1,221 @@
+"""
+sales_analytics.py
+
+Vectorized sales analytics over foodapp order history.
+Line items are held as parallel NumPy arrays (food id, qty, unit price in
+paise, timestamp, category code) and every report is a handful of
+bincount / argpartition calls - no Python loop per line item.
+
+History can be loaded from the order journal (order_journal.py) once and
+saved to .npz, which reloads tens of millions of lines in well under a second.
+"""
+
+import argparse
+import time
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from order_journal import CompactedHistoryError, replay_history
+
+# food ids up to this value are grouped with a dense bincount instead of np.unique
+DENSE_ID_LIMIT = 10_000_000
+
+
+@dataclass
+class SalesHistory:
+    food_ids: np.ndarray       # int64
+    qty: np.ndarray            # int64
+    price_paise: np.ndarray    # int64, unit price at the time of sale
+    ts: np.ndarray             # float64, unix seconds
+    category_codes: np.ndarray  # int32, index into categories
+    categories: List[str]
+    names: Dict[int, str]
+
+    def __len__(self) -> int:
+        return len(self.food_ids)
+
+    @property
+    def revenue_paise(self) -> np.ndarray:
+        return self.qty * self.price_paise
+
+    # ---- loading / saving ----
+
+    @classmethod
+    def from_journal(cls, directory: str, allow_partial: bool = False) -> "SalesHistory":
+        """
+        One pass over the journal into typed buffers, then zero-copy into NumPy.
+        Raises CompactedHistoryError if compaction removed earlier orders
+        (allow_partial=True loads what is left, with a warning).
+        """
+        food_ids, qty, prices = array("q"), array("q"), array("q")
+        ts, cats = array("d"), array("i")
+        category_codes: Dict[str, int] = {}
+        names: Dict[int, str] = {}
+        for record in replay_history(directory, allow_partial):
+            when = record["ts"]
+            for food_id, name, category, line_qty, unit_paise in record.get("lines", ()):
+                code = category_codes.get(category)
+                if code is None:
+                    code = category_codes[category] = len(category_codes)
+                names[food_id] = name
+                food_ids.append(food_id)
+                qty.append(line_qty)
+                prices.append(unit_paise)
+                ts.append(when)
+                cats.append(code)
+        return cls(
+            food_ids=np.frombuffer(food_ids, dtype=np.int64),
+            qty=np.frombuffer(qty, dtype=np.int64),
+            price_paise=np.frombuffer(prices, dtype=np.int64),
+            ts=np.frombuffer(ts, dtype=np.float64),
+            category_codes=np.frombuffer(cats, dtype=np.int32),
+            categories=list(category_codes),
+            names=names,
+        )
+
+    def save(self, path: str) -> None:
+        name_ids = np.fromiter(self.names.keys(), dtype=np.int64, count=len(self.names))
+        np.savez(
+            path,
+            food_ids=self.food_ids, qty=self.qty, price_paise=self.price_paise,
+            ts=self.ts, category_codes=self.category_codes,
+            categories=np.array(self.categories, dtype=str),
+            name_ids=name_ids, name_values=np.array(list(self.names.values()), dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "SalesHistory":
+        with np.load(path) as data:
+            return cls(
+                food_ids=data["food_ids"], qty=data["qty"], price_paise=data["price_paise"],
+                ts=data["ts"], category_codes=data["category_codes"],
+                categories=[str(c) for c in data["categories"]],
+                names=dict(zip(data["name_ids"].tolist(), data["name_values"].tolist())),
+            )
+
+    # ---- reports ----
+
+    def _by_item(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # float64 sums are exact for paise totals below 2**53 (~90 trillion rupees)
+        if len(self.food_ids) == 0:
+            return self.food_ids[:0], np.zeros(0, dtype=np.int64)
+        if self.food_ids.min() >= 0 and self.food_ids.max() <= DENSE_ID_LIMIT:
+            # menu ids are small integers: bucket by id directly, no sort needed
+            sums = np.bincount(self.food_ids, weights=values)
+            ids = np.flatnonzero(np.bincount(self.food_ids))
+            return ids, np.rint(sums[ids]).astype(np.int64)
+        ids, inverse = np.unique(self.food_ids, return_inverse=True)
+        sums = np.bincount(inverse, weights=values, minlength=len(ids))
+        return ids, np.rint(sums).astype(np.int64)
+
+    def revenue_by_item(self) -> Dict[int, int]:
+        """food_id -> revenue in paise."""
+        ids, sums = self._by_item(self.revenue_paise)
+        return dict(zip(ids.tolist(), sums.tolist()))
+
+    def qty_by_item(self) -> Dict[int, int]:
+        ids, sums = self._by_item(self.qty)
+        return dict(zip(ids.tolist(), sums.tolist()))
+
+    def revenue_by_category(self) -> Dict[str, int]:
+        sums = np.bincount(
+            self.category_codes, weights=self.revenue_paise, minlength=len(self.categories)
+        )
+        return dict(zip(self.categories, np.rint(sums).astype(np.int64).tolist()))
+
+    def top_items(self, n: int = 10, by: str = "revenue") -> List[Tuple[int, int]]:
+        """[(food_id, value)] for the n best sellers by "revenue" (paise) or "qty"."""
+        values = self.revenue_paise if by == "revenue" else self.qty
+        ids, sums = self._by_item(values)
+        if len(ids) == 0:
+            return []
+        n = min(n, len(ids))
+        picked = np.argpartition(sums, -n)[-n:]
+        picked = picked[np.argsort(sums[picked])[::-1]]
+        return list(zip(ids[picked].tolist(), sums[picked].tolist()))
+
+    def hourly_revenue(self, utc_offset_hours: Optional[float] = None) -> np.ndarray:
+        """Revenue in paise per hour of day (24 buckets), in local time by default."""
+        if utc_offset_hours is None:
+            offset = datetime.now().astimezone().utcoffset()
+            utc_offset_hours = offset.total_seconds() / 3600 if offset else 0.0
+        hours = ((self.ts + utc_offset_hours * 3600) // 3600).astype(np.int64) % 24
+        sums = np.bincount(hours, weights=self.revenue_paise, minlength=24)
+        return np.rint(sums).astype(np.int64)
+
+
+def synthetic_history(lines: int, foods: int = 500, seed: int = 1) -> SalesHistory:
+    rng = np.random.default_rng(seed)
+    categories = ["Pizza", "Sides", "Beverage", "Dessert"]
+    food_ids = rng.integers(1, foods + 1, size=lines, dtype=np.int64)
+    base_price = rng.integers(50, 600, size=foods + 1, dtype=np.int64) * 100
+    return SalesHistory(
+        food_ids=food_ids,
+        qty=rng.integers(1, 5, size=lines, dtype=np.int64),
+        price_paise=base_price[food_ids],
+        ts=time.time() - rng.random(lines) * 30 * 86400,
+        category_codes=(food_ids % len(categories)).astype(np.int32),
+        categories=categories,
+        names={i: f"Item {i}" for i in range(1, foods + 1)},
+    )
+
+
+def print_report(history: SalesHistory, top: int = 10) -> None:
+    print("\n" + "=" * 60)
+    print(f"SALES REPORT ({len(history)} line items)")
+    print("=" * 60)
+    print(f"{'Category':<30} {'Revenue (₹)':>29}")
+    print("-" * 60)
+    for category, paise in sorted(history.revenue_by_category().items(), key=lambda kv: -kv[1]):
+        print(f"{category:<30} {paise / 100:>29.2f}")
+    print("-" * 60)
+    print(f"{'Top item':<40} {'Revenue (₹)':>19}")
+    print("-" * 60)
+    for food_id, paise in history.top_items(top):
+        print(f"{history.names.get(food_id, food_id)!s:<40} {paise / 100:>19.2f}")
+    print("-" * 60)
+    print(f"{'Hour':<30} {'Revenue (₹)':>29}")
+    print("-" * 60)
+    for hour, paise in enumerate(history.hourly_revenue().tolist()):
+        print(f"{hour:02d}:00{'':<25} {paise / 100:>29.2f}")
+    print("=" * 60)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sales analytics over order history.")
+    parser.add_argument("--journal", metavar="DIR", help="order journal directory to load")
+    parser.add_argument("--npz", metavar="PATH", help="load (or, with --journal, save) a .npz history")
+    parser.add_argument("--allow-partial", action="store_true",
+                        help="load a compacted journal anyway (only orders after the last compaction)")
+    parser.add_argument("--synthetic", type=int, metavar="LINES",
+                        help="benchmark on LINES generated line items")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.synthetic:
+        history = synthetic_history(args.synthetic)
+    elif args.journal:
+        try:
+            history = SalesHistory.from_journal(args.journal, args.allow_partial)
+        except CompactedHistoryError as err:
+            parser.error(f"{err} (pass --allow-partial to load them anyway)")
+        if args.npz:
+            history.save(args.npz)
+    elif args.npz:
+        history = SalesHistory.load(args.npz)
+    else:
+        parser.error("give --journal, --npz or --synthetic")
+    load_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    print_report(history)
+    report_sec = time.perf_counter() - start
+    print(f"Loaded in {load_sec:.2f}s, reports computed in {report_sec:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
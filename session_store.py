@@ -0,0 +1,262 @@
+"""
+session_store.py
+
+Holds one Cart per customer session instead of run_app()'s single Cart.
+- LRU order + idle TTL eviction; memory is bounded by capping live
+  sessions at max_sessions
+- one lock per session, usable from threads (session) and asyncio (asession)
+- hit / miss / eviction counters for sizing a node
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional
+
+from foodapp import Cart
+
+# asession() backoff while a cart is busy (seconds)
+ASYNC_POLL_MIN = 0.0005
+ASYNC_POLL_MAX = 0.02
+
+
+@dataclass
+class SessionStats:
+    hits: int = 0
+    misses: int = 0
+    created: int = 0
+    evicted_lru: int = 0
+    evicted_idle: int = 0
+    dropped: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def evictions(self) -> int:
+        return self.evicted_lru + self.evicted_idle
+
+
+class _Session:
+    __slots__ = ("cart", "lock", "last_access", "in_use")
+
+    def __init__(self, now: float) -> None:
+        self.cart = Cart()
+        # a plain Lock (not RLock) so asyncio code may release it from the loop thread
+        self.lock = threading.Lock()
+        self.last_access = now
+        self.in_use = 0
+
+
+class SessionStore:
+    """
+    Thread-safe map of session_id -> Cart.
+    The store lock only guards the dict and LRU order; cart edits happen under
+    the per-session lock, so customers never wait on each other.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 10_000,
+        idle_ttl: float = 30 * 60,
+        sweep_every: int = 1_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_sessions <= 0:
+            raise ValueError("max_sessions must be greater than 0.")
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.sweep_every = sweep_every
+        self._clock = clock
+        # least recently used first
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ops = 0
+        self.stats = SessionStats()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return self._lookup(session_id, self._clock(), count=False) is not None
+
+    # ---- internal (store lock held) ----
+
+    def _expired(self, session: _Session, now: float) -> bool:
+        return session.in_use == 0 and now - session.last_access > self.idle_ttl
+
+    def _lookup(self, session_id: str, now: float, count: bool = True) -> Optional[_Session]:
+        session = self._sessions.get(session_id)
+        if session is not None and self._expired(session, now):
+            del self._sessions[session_id]
+            self.stats.evicted_idle += 1
+            session = None
+        if session is None:
+            if count:
+                self.stats.misses += 1
+            return None
+        if count:
+            self.stats.hits += 1
+        session.last_access = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _create(self, session_id: str, now: float) -> _Session:
+        session = _Session(now)
+        self._sessions[session_id] = session
+        self.stats.created += 1
+        self._evict_over_cap()
+        return session
+
+    def _evict_over_cap(self) -> None:
+        # Oldest first; sessions that are currently checked out are skipped.
+        excess = len(self._sessions) - self.max_sessions
+        if excess <= 0:
+            return
+        victims = []
+        for session_id, session in self._sessions.items():
+            if session.in_use == 0:
+                victims.append(session_id)
+                if len(victims) == excess:
+                    break
+        for session_id in victims:
+            del self._sessions[session_id]
+        self.stats.evicted_lru += len(victims)
+
+    def _sweep(self, now: float) -> int:
+        victims = []
+        for session_id, session in self._sessions.items():
+            if now - session.last_access <= self.idle_ttl:
+                break  # LRU order: everything after this is fresher
+            if session.in_use == 0:
+                victims.append(session_id)
+        for session_id in victims:
+            del self._sessions[session_id]
+        self.stats.evicted_idle += len(victims)
+        return len(victims)
+
+    def _checkout(self, session_id: str, create: bool) -> Optional[_Session]:
+        with self._lock:
+            now = self._clock()
+            self._ops += 1
+            if self._ops % self.sweep_every == 0:
+                self._sweep(now)
+            session = self._lookup(session_id, now)
+            if session is None and create:
+                session = self._create(session_id, now)
+            if session is not None:
+                session.in_use += 1
+            return session
+
+    def _checkin(self, session: _Session) -> None:
+        with self._lock:
+            session.in_use -= 1
+            session.last_access = self._clock()
+
+    # ---- public API ----
+
+    def get(self, session_id: str) -> Optional[Cart]:
+        """The session's cart, or None if unknown/expired. No locking of the cart."""
+        with self._lock:
+            session = self._lookup(session_id, self._clock())
+            return session.cart if session else None
+
+    def get_or_create(self, session_id: str) -> Cart:
+        session = self._checkout(session_id, create=True)
+        self._checkin(session)
+        return session.cart
+
+    @contextmanager
+    def session(self, session_id: str, create: bool = True) -> Iterator[Cart]:
+        """Hold the session's cart exclusively (threads). Raises KeyError if missing and create=False."""
+        session = self._checkout(session_id, create)
+        if session is None:
+            raise KeyError("Session not found.")
+        try:
+            with session.lock:
+                yield session.cart
+        finally:
+            self._checkin(session)
+
+    @asynccontextmanager
+    async def asession(self, session_id: str, create: bool = True) -> AsyncIterator[Cart]:
+        """Same as session() but waits for a busy cart without blocking the event loop."""
+        session = self._checkout(session_id, create)
+        if session is None:
+            raise KeyError("Session not found.")
+        try:
+            # Poll instead of parking a thread in the loop's default executor on
+            # lock.acquire(): a burst of waiters on one hot cart would fill that
+            # executor and starve every other to_thread()/run_in_executor(None) call.
+            delay = ASYNC_POLL_MIN
+            while not session.lock.acquire(blocking=False):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, ASYNC_POLL_MAX)
+            try:
+                yield session.cart
+            finally:
+                session.lock.release()
+        finally:
+            self._checkin(session)
+
+    def drop(self, session_id: str) -> bool:
+        """Forget a session (e.g. after its order is placed)."""
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                return False
+            self.stats.dropped += 1
+            return True
+
+    def evict_idle(self) -> int:
+        """Evict every session idle for longer than idle_ttl. Returns how many."""
+        with self._lock:
+            return self._sweep(self._clock())
+
+    def metrics(self) -> Dict[str, float]:
+        with self._lock:
+            live = len(self._sessions)
+        return {
+            "live_sessions": live,
+            "max_sessions": self.max_sessions,
+            "hits": self.stats.hits,
+            "misses": self.stats.misses,
+            "hit_rate": round(self.stats.hit_rate, 4),
+            "created": self.stats.created,
+            "evicted_lru": self.stats.evicted_lru,
+            "evicted_idle": self.stats.evicted_idle,
+            "dropped": self.stats.dropped,
+        }
+
+
+if __name__ == "__main__":
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+
+    from foodapp import build_default_menu
+
+    menu = build_default_menu()
+    foods = menu.foods
+    store = SessionStore(max_sessions=2_000, idle_ttl=60)
+
+    def customer(worker: int) -> None:
+        rng = random.Random(worker)
+        for _ in range(5_000):
+            with store.session(f"S{rng.randint(0, 3_000)}") as cart:
+                cart.add(rng.choice(foods), rng.randint(1, 3))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(customer, range(8)))
+    elapsed = time.perf_counter() - start
+
+    print("=" * 60)
+    print(f"{'40000 cart edits on 8 threads (s)':<40} {elapsed:>19.3f}")
+    for key, value in store.metrics().items():
+        print(f"{key:<40} {value:>19}")
+    print("=" * 60)